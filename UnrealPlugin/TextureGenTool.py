@@ -3,11 +3,25 @@ import cv2
 import numpy as np
 from PIL import Image
 import os
+from unreal_asset_ops import AssetBatch
+
+MASTER_PATH = "/Game/Materials/M_Master_Standard"
+
+# Opt-in: maps whose 8-bit values stay within FOLD_TOLERANCE are bound as a constant
+# ('<Map>Value' Scalar/Vector Parameter on the Master) instead of a texture. Only
+# maps whose parameter exists on the Master are folded; the rest stay textures.
+FOLD_UNIFORM_MAPS = False
+FOLD_TOLERANCE = 2
+FOLDABLE_MAPS = ["Normal", "Roughness", "AO"]
 
 # --- CORE ENGINE (Adapted for Unreal) ---
 # This matches the "Crazy Good" logic but simplified for direct memory usage if needed
 
-def generate_maps_from_file(input_path):
+def generate_maps_from_file(input_path, foldable=()):
+    """
+    Generates Normal/Roughness/AO next to input_path. Maps listed in `foldable`
+    that turn out uniform are returned as a constant instead of a file path.
+    """
     unreal.log(f"Processing: {input_path}")
     
     # Load
@@ -80,9 +94,23 @@ def generate_maps_from_file(input_path):
             Image.fromarray(arr).convert("L").save(p)
         return p
 
-    out_files["Normal"] = save(normal_map, "Normal", True)
-    out_files["Roughness"] = save(roughness_map, "Roughness")
-    out_files["AO"] = save(ao_map, "AO")
+    # Near-constant maps (flat plastics, painted metal...) become a value, not a file
+    def save_or_fold(arr, suffix, is_rgb=False):
+        if suffix not in foldable:
+            return save(arr, suffix, is_rgb)
+        pixels = arr.reshape(-1, arr.shape[2]) if arr.ndim == 3 else arr.reshape(-1, 1)
+        if np.all(pixels.max(axis=0).astype(int) - pixels.min(axis=0) <= FOLD_TOLERANCE):
+            value = [round(float(v) / 255.0, 4) for v in pixels.mean(axis=0)]
+            unreal.log(f"{suffix} is uniform; using a constant instead of a texture")
+            stale_file = f"{base_path}_{suffix}.png"
+            if os.path.exists(stale_file):
+                os.remove(stale_file) # Left over from a run that wrote it as a texture
+            return value if len(value) > 1 else value[0]
+        return save(arr, suffix, is_rgb)
+
+    out_files["Normal"] = save_or_fold(normal_map, "Normal", True)
+    out_files["Roughness"] = save_or_fold(roughness_map, "Roughness")
+    out_files["AO"] = save_or_fold(ao_map, "AO")
     # Base Color is just the input
     out_files["BaseColor"] = input_path 
     
@@ -99,11 +127,43 @@ class TextureGenAction(unreal.ToolMenuEntryScript):
         utility = unreal.EditorUtilityLibrary()
         selected_assets = utility.get_selected_assets()
         
-        for asset in selected_assets:
-            if isinstance(asset, unreal.Texture2D):
-                self.process_texture(asset)
+        # One batch for the whole selection: a single import call, cached
+        # lookups, and one save at the end.
+        with AssetBatch() as batch:
+            foldable = self.foldable_maps(batch)
+            pending = []
+            for asset in selected_assets:
+                if isinstance(asset, unreal.Texture2D):
+                    queued = self.process_texture(asset, batch, foldable)
+                    if queued:
+                        pending.append(queued)
+            
+            imported = batch.flush_imports()
+            
+            # 4. Create Materials
+            for texture_asset, asset_path, queued_maps, constants in pending:
+                maps = {map_type: imported[path] for map_type, path in queued_maps.items() if path in imported}
+                self.create_material(texture_asset, maps, asset_path, batch, constants)
                 
-    def process_texture(self, texture_asset):
+    def foldable_maps(self, batch):
+        """Maps that may be folded: FOLD_UNIFORM_MAPS is on and the Master has their '<Map>Value'."""
+        if not FOLD_UNIFORM_MAPS:
+            return []
+        master = batch.load(MASTER_PATH)
+        if not master:
+            return []
+        params = batch.parameter_names(master)
+        missing = [m for m in FOLDABLE_MAPS if f"{m}Value" not in params]
+        if missing:
+            unreal.log_warning(f"⚠️ Master Material has no {', '.join(m + 'Value' for m in missing)} parameter; "
+                               f"uniform {', '.join(missing)} maps are imported as textures instead.")
+        return [m for m in FOLDABLE_MAPS if m not in missing]
+
+    def process_texture(self, texture_asset, batch, foldable=()):
+        """
+        Generates maps for one texture and queues their import.
+        Returns (texture, folder, {map: asset path}, {map: constant value}).
+        """
         unreal.log(f"Generating PBR for: {texture_asset.get_name()}")
         
         # 1. Get Source File Path
@@ -113,77 +173,69 @@ class TextureGenAction(unreal.ToolMenuEntryScript):
         
         if not source_file or not os.path.exists(source_file):
             unreal.log_error("❌ Source file not found! Texture must be imported from disk.")
-            return
+            return None
 
         # 2. Generate Maps
-        generated_files = generate_maps_from_file(source_file)
+        generated_files = generate_maps_from_file(source_file, foldable)
         if not generated_files:
-            return
+            return None
             
-        # 3. Import New Maps
+        # 3. Queue New Maps for Import
         asset_path = os.path.dirname(texture_asset.get_path_name())
-        imported_assets = {}
+        queued_maps = {}
+        constants = {}
         
         for map_type, file_path in generated_files.items():
             if map_type == "BaseColor": continue # Skip base color (it's the source)
+            if not isinstance(file_path, str):
+                constants[map_type] = file_path # Folded to a constant, nothing to import
+                # A texture imported by an earlier run would still be bound; remove it
+                batch.delete(f"{asset_path}/{texture_asset.get_name()}_{map_type}")
+                continue
             
-            task = unreal.AssetImportTask()
-            task.filename = file_path
-            task.destination_path = asset_path
-            task.destination_name = f"{texture_asset.get_name()}_{map_type}"
-            task.replace_existing = True
-            task.automated = True
-            task.save = True
-            
-            unreal.AssetToolsHelpers.get_asset_tools().import_asset_tasks([task])
-            
-            # Load and Setup
-            new_asset = unreal.EditorAssetLibrary.load_asset(f"{asset_path}/{task.destination_name}")
-            if new_asset:
-                if map_type == "Normal":
-                    new_asset.set_editor_property("compression_settings", unreal.TextureCompressionSettings.TC_NORMALMAP)
-                    new_asset.set_editor_property("srgb", False)
-                elif map_type in ["Roughness", "AO", "Metallic"]:
-                    new_asset.set_editor_property("compression_settings", unreal.TextureCompressionSettings.TC_MASKS)
-                    new_asset.set_editor_property("srgb", False)
-                
-                # new_asset.post_edit_change() # Removed to prevent AttributeError
-                unreal.EditorAssetLibrary.save_loaded_asset(new_asset)
-                imported_assets[map_type] = new_asset
+            queued_maps[map_type] = batch.queue_import(
+                file_path, asset_path, f"{texture_asset.get_name()}_{map_type}",
+                on_imported=lambda new_asset, map_type=map_type: self.setup_texture(new_asset, map_type)
+            )
 
-        # 4. Create Material
-        self.create_material(texture_asset, imported_assets, asset_path)
+        return texture_asset, asset_path, queued_maps, constants
 
-    def create_material(self, base_tex, maps, folder):
-        mat_name = f"M_{base_tex.get_name()}"
-        
-        # Create Basic Material
-        asset_tools = unreal.AssetToolsHelpers.get_asset_tools()
-        mat_factory = unreal.MaterialFactoryNew()
-        mat = asset_tools.create_asset(mat_name, folder, unreal.Material, mat_factory)
-        
-        # Setup Material Graph
-        # Note: In Python we can't easily add nodes visually, but we can creating a Material Instance 
-        # is usually better IF we have a Master. But let's try to make a basic graph for "Best Ever" standalone.
-        # Actually, standard practice is MI from Master.
-        
-        # Let's check for Master Material first.
-        MASTER_PATH = "/Game/Materials/M_Master_Standard"
-        master = unreal.EditorAssetLibrary.load_asset(MASTER_PATH)
+    def setup_texture(self, new_asset, map_type):
+        if map_type == "Normal":
+            new_asset.set_editor_property("compression_settings", unreal.TextureCompressionSettings.TC_NORMALMAP)
+            new_asset.set_editor_property("srgb", False)
+        elif map_type in ["Roughness", "AO", "Metallic"]:
+            new_asset.set_editor_property("compression_settings", unreal.TextureCompressionSettings.TC_MASKS)
+            new_asset.set_editor_property("srgb", False)
+        # new_asset.post_edit_change() # Removed to prevent AttributeError
+
+    def create_material(self, base_tex, maps, folder, batch, constants=None):
+        # Standard practice is a Material Instance of the Master Material.
+        # Only fall back to a standalone Material when no Master exists.
+        master = batch.load(MASTER_PATH)
         
         if master:
             # Create Instance
             factory = unreal.MaterialInstanceConstantFactoryNew()
-            inst = asset_tools.create_asset(f"MI_{base_tex.get_name()}", folder, unreal.MaterialInstanceConstant, factory)
+            inst = batch.create(f"MI_{base_tex.get_name()}", folder, unreal.MaterialInstanceConstant, factory)
             unreal.MaterialEditingLibrary.set_material_instance_parent(inst, master)
             
             # Set Params
             unreal.MaterialEditingLibrary.set_material_instance_texture_parameter_value(inst, "BaseColor", base_tex)
             for map_type, tex in maps.items():
                 unreal.MaterialEditingLibrary.set_material_instance_texture_parameter_value(inst, map_type, tex)
+            for map_type, value in (constants or {}).items():
+                if isinstance(value, list):
+                    unreal.MaterialEditingLibrary.set_material_instance_vector_parameter_value(
+                        inst, f"{map_type}Value", unreal.LinearColor(value[0], value[1], value[2], 1.0))
+                else:
+                    unreal.MaterialEditingLibrary.set_material_instance_scalar_parameter_value(inst, f"{map_type}Value", value)
                 
             unreal.log("✅ Material Instance Created!")
         else:
+            # Create Basic Material
+            # Note: In Python we can't easily add nodes visually, so this is an empty placeholder.
+            batch.create(f"M_{base_tex.get_name()}", folder, unreal.Material, unreal.MaterialFactoryNew())
             unreal.log_warning(f"⚠️ Master Material not found at {MASTER_PATH}. Maps imported but material not built.")
 
 # --- MENU REGISTRATION ---
@@ -0,0 +1,147 @@
+import unreal
+
+# ------------------------------------------------------------------------------
+# BATCHED ASSET OPERATIONS
+# ------------------------------------------------------------------------------
+# Shared by TextureGenTool.py and scripts/unreal_importer.py. Editor calls are
+# expensive, so an AssetBatch:
+#   - collects every texture import and runs them in ONE import_asset_tasks call
+#   - caches load_asset / does_asset_exist / directory lookups (and material
+#     parameter names) for the whole run
+#   - tracks modified assets and saves them ONCE at the end
+#
+# Usage:
+#   with AssetBatch() as batch:
+#       batch.queue_import(path, "/Game/Foo", "T_Foo", on_imported=setup)
+#       batch.flush_imports()
+#       ...
+#   # leaving the block flushes pending imports and saves dirty assets
+
+class AssetBatch:
+    def __init__(self):
+        self.asset_tools = unreal.AssetToolsHelpers.get_asset_tools()
+        self._pending = []   # (AssetImportTask, asset_path, on_imported)
+        self._loaded = {}    # asset path -> asset (or None if missing)
+        self._exists = {}    # asset path -> bool
+        self._dirs = set()   # directories known to exist
+        self._dirty = {}     # asset path -> asset
+        self._params = {}    # material path -> scalar/vector parameter names
+
+    # --- Lookups ---
+
+    def load(self, asset_path):
+        """Cached EditorAssetLibrary.load_asset."""
+        if asset_path not in self._loaded:
+            asset = unreal.EditorAssetLibrary.load_asset(asset_path)
+            self._loaded[asset_path] = asset
+            self._exists[asset_path] = asset is not None
+        return self._loaded[asset_path]
+
+    def exists(self, asset_path):
+        """Cached EditorAssetLibrary.does_asset_exist."""
+        if asset_path not in self._exists:
+            self._exists[asset_path] = unreal.EditorAssetLibrary.does_asset_exist(asset_path)
+        return self._exists[asset_path]
+
+    def parameter_names(self, material):
+        """Cached scalar and vector parameter names of a material (e.g. the Master)."""
+        key = material.get_path_name()
+        if key not in self._params:
+            lib = unreal.MaterialEditingLibrary
+            names = list(lib.get_scalar_parameter_names(material)) + list(lib.get_vector_parameter_names(material))
+            self._params[key] = {str(name) for name in names}
+        return self._params[key]
+
+    def ensure_directory(self, path):
+        if path in self._dirs:
+            return
+        if not unreal.EditorAssetLibrary.does_directory_exist(path):
+            unreal.EditorAssetLibrary.make_directory(path)
+        self._dirs.add(path)
+
+    # --- Imports ---
+
+    def queue_import(self, file_path, dest_path, dest_name, factory=None, on_imported=None):
+        """
+        Queues a file import. on_imported(asset) runs after the batched import,
+        e.g. to set compression settings. Returns the future asset path.
+        """
+        task = unreal.AssetImportTask()
+        task.filename = file_path
+        task.destination_path = dest_path
+        task.destination_name = dest_name
+        task.replace_existing = True
+        task.automated = True
+        task.save = False  # Saved together in save_all()
+        if factory is not None:
+            task.factory = factory
+
+        asset_path = f"{dest_path}/{dest_name}"
+        self._pending.append((task, asset_path, on_imported))
+        return asset_path
+
+    def flush_imports(self):
+        """Runs every queued import in one call. Returns {asset path: asset}."""
+        if not self._pending:
+            return {}
+        pending, self._pending = self._pending, []
+        self.asset_tools.import_asset_tasks([task for task, _, _ in pending])
+
+        imported = {}
+        for _, asset_path, on_imported in pending:
+            # Re-imports replace the asset, so drop anything cached for this path
+            self._loaded.pop(asset_path, None)
+            self._exists.pop(asset_path, None)
+            asset = self.load(asset_path)
+            if asset is None:
+                unreal.log_warning(f"Import did not produce {asset_path}")
+                continue
+            if on_imported:
+                on_imported(asset)
+            self.mark_dirty(asset, asset_path)
+            imported[asset_path] = asset
+        return imported
+
+    # --- Creation / Saving ---
+
+    def create(self, name, folder, asset_class, factory):
+        """create_asset, or the cached existing asset if it's already there."""
+        asset_path = f"{folder}/{name}"
+        if self.exists(asset_path):
+            asset = self.load(asset_path)
+        else:
+            asset = self.asset_tools.create_asset(name, folder, asset_class, factory)
+            self._loaded[asset_path] = asset
+            self._exists[asset_path] = asset is not None
+        if asset is not None:
+            self.mark_dirty(asset, asset_path)
+        return asset
+
+    def delete(self, asset_path):
+        """Deletes an asset if it exists (e.g. a texture replaced by a constant). Returns True if deleted."""
+        if not self.exists(asset_path):
+            return False
+        deleted = unreal.EditorAssetLibrary.delete_asset(asset_path)
+        if deleted:
+            self._loaded[asset_path] = None
+            self._exists[asset_path] = False
+            self._dirty.pop(asset_path, None)
+        return deleted
+
+    def mark_dirty(self, asset, asset_path=None):
+        self._dirty[asset_path or asset.get_path_name()] = asset
+
+    def save_all(self):
+        """Saves every modified asset in a single call."""
+        if not self._dirty:
+            return
+        assets = list(self._dirty.values())
+        self._dirty = {}
+        unreal.EditorAssetLibrary.save_loaded_assets(assets, only_if_is_dirty=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush_imports()
+        self.save_all()
@@ -3,9 +3,10 @@ import tkinter
 from tkinter import filedialog
 from PIL import Image, ImageTk, ImageOps
 import os
-import threading
-import time
-from texture_engine import TextureEngine
+import queue
+from texture_engine import TextureEngine, RESOLUTION_LADDER, MAP_DEFAULTS
+from fft_engine import FFTTextureEngine
+from export_queue import ExportQueue
 
 # Set Theme
 ctk.set_appearance_mode("Dark")
@@ -50,14 +51,16 @@ class TextureApp(ctk.CTk):
         
         self.add_separator(self.tab_gen, "Map Settings")
         
-        # Sliders
+        # Sliders (engine-driven ones start at the engine defaults, so an untouched
+        # slider exports exactly what the engine would on its own)
         self.sliders = {}
-        self.create_slider(self.tab_gen, "Normal Intensity", 0.1, 5.0, 1.0)
-        self.create_slider(self.tab_gen, "Micro Detail", 0.0, 1.0, 0.6)
-        self.create_slider(self.tab_gen, "Roughness Contrast", 0.5, 3.0, 1.2)
-        self.create_slider(self.tab_gen, "AO Radius", 10, 100, 30)
+        self.create_slider(self.tab_gen, "Normal Intensity", 0.1, 5.0, MAP_DEFAULTS["Normal"]["strength"])
+        self.create_slider(self.tab_gen, "Micro Detail", 0.0, 1.0, MAP_DEFAULTS["Normal"]["detail_weight"])
+        self.create_slider(self.tab_gen, "Roughness Contrast", 0.5, 3.0, MAP_DEFAULTS["Roughness"]["contrast"])
+        self.create_slider(self.tab_gen, "AO Radius", 10, 100, MAP_DEFAULTS["AO"]["radius"])
         self.create_slider(self.tab_gen, "Displacement Height", 0.1, 2.0, 1.0)
         
+        # Seamless maps use the FFT engine, whose filters wrap around the image edges
         self.chk_seamless = ctk.CTkCheckBox(self.tab_gen, text="Seamless Tiling (AI Fix)")
         self.chk_seamless.pack(pady=20, padx=10, anchor="w")
         
@@ -74,6 +77,13 @@ class TextureApp(ctk.CTk):
         self.combo_format.pack(pady=10, fill="x")
         self.combo_format.set("PNG (Lossless)")
         
+        self.combo_resolution = ctk.CTkComboBox(self.tab_export, values=["Source Resolution", "Ladder (4K / 2K / 1K / 512)"])
+        self.combo_resolution.pack(pady=10, fill="x")
+        self.combo_resolution.set("Source Resolution")
+        
+        self.chk_fold = ctk.CTkCheckBox(self.tab_export, text="Fold uniform maps into constants")
+        self.chk_fold.pack(pady=10, anchor="w")
+        
         # Big Export Button
         self.btn_export = ctk.CTkButton(self.sidebar, text="🚀 EXPORT ALL MAPS", height=50, fg_color="#2ecc71", hover_color="#27ae60", font=ctk.CTkFont(size=16, weight="bold"), command=self.export_maps)
         self.btn_export.pack(pady=20, padx=20, fill="x", side="bottom")
@@ -97,8 +107,15 @@ class TextureApp(ctk.CTk):
 
         # State
         self.current_image_path = None
+        self.loaded_images = []
         self.export_dir = None
         
+        # Export Queue (worker thread posts events here; the UI thread drains them)
+        self.export_events = queue.Queue()
+        self.export_queue = ExportQueue(self.engine, lambda job, event, detail: self.export_events.put((job, event, detail)),
+                                        seamless_engine=FFTTextureEngine())
+        self.after(100, self.poll_export_events)
+        
     def add_separator(self, parent, text):
         lbl = ctk.CTkLabel(parent, text=text, font=ctk.CTkFont(size=12, weight="bold"), text_color="gray")
         lbl.pack(pady=(15, 5), padx=5, anchor="w")
@@ -121,20 +138,28 @@ class TextureApp(ctk.CTk):
         self.update_idletasks()
 
     def load_image(self):
-        file_path = filedialog.askopenfilename(filetypes=[("Images", "*.jpg;*.png;*.jpeg;*.tga")])
-        if file_path:
-            self.current_image_path = file_path
-            self.set_status(f"Loaded: {os.path.basename(file_path)}")
+        file_paths = filedialog.askopenfilenames(filetypes=[("Images", "*.jpg;*.png;*.jpeg;*.tga")])
+        if file_paths:
+            file_paths = list(file_paths)
+            # Exports for images that are no longer loaded are stale
+            self.export_queue.cancel_where(lambda job: job.image_path not in file_paths)
+            
+            self.loaded_images = file_paths
+            self.current_image_path = file_paths[0]
+            if len(file_paths) > 1:
+                self.set_status(f"Loaded {len(file_paths)} images")
+            else:
+                self.set_status(f"Loaded: {os.path.basename(self.current_image_path)}")
             
             # Display Image
             try:
-                pil_img = Image.open(file_path)
+                pil_img = Image.open(self.current_image_path)
                 # Resize for preview (keep aspect ratio)
                 pil_img.thumbnail((1000, 800))
                 ctk_img = ctk.CTkImage(light_image=pil_img, dark_image=pil_img, size=pil_img.size)
                 
                 self.image_preview.configure(image=ctk_img, text="")
-                self.title(f"TextureGen Pro - {os.path.basename(file_path)}")
+                self.title(f"TextureGen Pro - {os.path.basename(self.current_image_path)}")
             except Exception as e:
                 self.set_status(f"Error loading image: {e}", "red")
 
@@ -145,33 +170,64 @@ class TextureApp(ctk.CTk):
             self.lbl_export_path.configure(text=f".../{os.path.basename(path)}")
 
     def export_maps(self):
-        if not self.current_image_path:
+        if not self.loaded_images:
             self.set_status("⚠️ No image loaded!", "orange")
             return
             
-        target_dir = self.export_dir if self.export_dir else os.path.dirname(self.current_image_path)
-        
-        # Thread generation
-        threading.Thread(target=self.run_generation, args=(target_dir,)).start()
+        resolutions = RESOLUTION_LADDER if self.combo_resolution.get().startswith("Ladder") else None
+        for image_path in self.loaded_images:
+            target_dir = self.export_dir if self.export_dir else os.path.dirname(image_path)
+            # Duplicate requests for a queued or running export are coalesced
+            self.export_queue.submit(image_path, target_dir, resolutions, self.collect_params(),
+                                     seamless=bool(self.chk_seamless.get()), fold=bool(self.chk_fold.get()))
+        
+        self.update_export_button()
 
-    def run_generation(self, export_dir):
-        self.btn_export.configure(state="disabled", text="Generating...")
-        self.set_status("⏳ Generating Maps (High Fidelity)...", "#3498db")
-        
-        start_time = time.time()
+    def collect_params(self):
+        """Slider values as per-map engine parameters (only changed maps get regenerated)."""
+        detail = self.sliders["Micro Detail"].get()
+        return {
+            "Normal": {
+                "strength": self.sliders["Normal Intensity"].get(),
+                "detail_weight": detail,
+                "shape_weight": 1.0 - detail,
+            },
+            "Roughness": {"contrast": self.sliders["Roughness Contrast"].get()},
+            "AO": {"radius": self.sliders["AO Radius"].get()},
+        }
+
+    def update_export_button(self):
+        pending = self.export_queue.pending_count()
+        if pending:
+            self.btn_export.configure(text=f"⏳ Exporting... ({pending} queued)")
+        else:
+            self.btn_export.configure(text="🚀 EXPORT ALL MAPS")
+
+    def poll_export_events(self):
+        """Runs on the UI thread: applies progress posted by the export worker."""
         try:
-            # Pass slider values to engine (future: update engine to accept these params dynamically)
-            # For now, we use the default rigorous engine
-            self.engine.process_pipeline(self.current_image_path, export_dir)
-            
-            elapsed = time.time() - start_time
-            self.set_status(f"✅ Success! Generated 5 maps in {elapsed:.2f}s", "#2ecc71")
-            
-        except Exception as e:
-            self.set_status(f"❌ Generation Failed: {e}", "red")
-            print(e)
-            
-        self.btn_export.configure(state="normal", text="🚀 EXPORT ALL MAPS")
+            while True:
+                job, event, detail = self.export_events.get_nowait()
+                name = os.path.basename(job.image_path)
+                if event == "started":
+                    self.set_status(f"⏳ Generating Maps (High Fidelity): {name}", "#3498db")
+                elif event == "stage":
+                    self.set_status(f"⏳ {name}: {detail}", "#3498db")
+                elif event == "done":
+                    self.set_status(f"✅ Success! Exported maps for {name} in {detail:.2f}s", "#2ecc71")
+                elif event == "failed":
+                    self.set_status(f"❌ Generation Failed: {detail}", "red")
+                    print(detail)
+                elif event == "cancelled":
+                    self.set_status(f"Cancelled export of {name}", "orange")
+                self.update_export_button()
+        except queue.Empty:
+            pass
+        self.after(100, self.poll_export_events)
+
+    def destroy(self):
+        self.export_queue.close()
+        super().destroy()
 
 if __name__ == "__main__":
     app = TextureApp()
@@ -0,0 +1,235 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+
+# ------------------------------------------------------------------------------
+# SELF-CALIBRATING BACKEND DISPATCH
+# ------------------------------------------------------------------------------
+# The hot TextureEngine filter operations have several interchangeable
+# implementations. Which one is fastest depends on image size, kernel size and
+# the host, so `python calibration.py run` micro-benchmarks every candidate on
+# this machine and stores the winners in a dispatch table keyed by size buckets.
+# TextureEngine consults the table on every call of those operations.
+#
+# Table location: $TEXTUREGEN_DISPATCH_FILE or ~/.texturegen/dispatch.json
+# Override:       $TEXTUREGEN_BACKEND="separable" (every op) or
+#                 "gaussian_blur=filter2d,normal_gradients=separable" (per op).
+#                 Use it for reproducible runs; it bypasses the table. Unknown
+#                 operation or backend names are an error, not a silent default.
+#
+# A table is only used on the host configuration it was measured on (CPU count,
+# OpenCV and NumPy versions); after an upgrade the defaults apply until re-run.
+
+# Operation -> candidate backends (first one is the default)
+OPERATIONS = {
+    "gaussian_blur": ["separable", "filter2d"],
+    "normal_gradients": ["separable", "filter2d"],
+    "height_blend": ["separable", "filter2d"],
+}
+
+DEFAULT_SIZES = [512, 1024, 2048, 4096]
+DEFAULT_BLUR_KERNELS = [9, 31, 101, 301]
+
+def default_table_path():
+    return os.environ.get("TEXTUREGEN_DISPATCH_FILE") or os.path.join(
+        os.path.expanduser("~"), ".texturegen", "dispatch.json")
+
+def _bucket(value, lo, hi):
+    """Smallest power of two >= value, clamped to [lo, hi]."""
+    return min(hi, max(lo, 1 << max(0, math.ceil(math.log2(max(value, 1))))))
+
+def size_bucket(shape):
+    return _bucket(max(shape[:2]), 256, 16384)
+
+def kernel_bucket(ksize):
+    return _bucket(ksize, 4, 2048) if ksize else 0
+
+def _host_info():
+    import cv2
+    import numpy as np
+    return {"cpu_count": os.cpu_count(), "opencv": cv2.__version__, "numpy": np.__version__}
+
+def _parse_override(text):
+    """Parses $TEXTUREGEN_BACKEND. Raises ValueError on unknown operations or backends."""
+    if not text:
+        return None
+    if "=" not in text:
+        override = {op: text.strip() for op in OPERATIONS}
+    else:
+        override = {}
+        for part in text.split(","):
+            op, _, backend = part.partition("=")
+            override[op.strip()] = backend.strip()
+    for op, backend in override.items():
+        if op not in OPERATIONS:
+            raise ValueError(f"TEXTUREGEN_BACKEND: unknown operation '{op}' (expected one of {', '.join(OPERATIONS)})")
+        if backend not in OPERATIONS[op]:
+            raise ValueError(f"TEXTUREGEN_BACKEND: unknown backend '{backend}' for {op} "
+                             f"(expected one of {', '.join(OPERATIONS[op])})")
+    return override
+
+
+class DispatchTable:
+    """Maps (operation, image size, kernel size) to the backend to use."""
+
+    def __init__(self, entries=None, host=None, override=None):
+        self.entries = entries or {}  # op -> {"size|kernel": {"backend": ..., "timings": {...}}}
+        self.host = host or {}
+        self.override = override or {}
+        self._lookup_cache = {}
+
+    @classmethod
+    def fixed(cls, backend):
+        """A table that always picks `backend` (for reproducible runs)."""
+        return cls(override={op: backend for op in OPERATIONS})
+
+    def backend(self, op, shape, ksize=0):
+        if op in self.override:
+            return self.override[op]
+        key = (op, size_bucket(shape), kernel_bucket(ksize))
+        choice = self._lookup_cache.get(key)
+        if choice is None:
+            choice = self._lookup_cache[key] = self._nearest(*key)
+        return choice
+
+    def _nearest(self, op, size, kernel):
+        """Winner of the closest calibrated bucket (log distance), or the default backend."""
+        best, best_dist = OPERATIONS[op][0], None
+        for bucket_key, entry in self.entries.get(op, {}).items():
+            s, k = (int(v) for v in bucket_key.split("|"))
+            dist = abs(math.log2(s) - math.log2(size)) + abs(math.log2(max(k, 1)) - math.log2(max(kernel, 1)))
+            if best_dist is None or dist < best_dist:
+                best, best_dist = entry["backend"], dist
+        return best
+
+    def to_json(self):
+        return {"host": self.host, "created": time.time(), "entries": self.entries}
+
+
+def load_dispatch(path=None):
+    """Loads the host's dispatch table (plus any $TEXTUREGEN_BACKEND override)."""
+    override = _parse_override(os.environ.get("TEXTUREGEN_BACKEND"))
+    path = path or default_table_path()
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return DispatchTable(override=override)
+    saved, current = data.get("host", {}), _host_info()
+    changed = [key for key in current if saved.get(key) != current[key]]
+    if changed:
+        print(f"Dispatch table {path} was calibrated with a different {', '.join(changed)}; "
+              f"using defaults. Re-run calibration.")
+        return DispatchTable(override=override)
+    return DispatchTable(data.get("entries"), data.get("host"), override)
+
+def save_dispatch(table, path=None):
+    path = path or default_table_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(table.to_json(), f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+# --- Benchmarking ---
+
+def _time_best(fn, repeats):
+    fn()  # Warm-up (kernel construction, allocator)
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def _cases(sizes, blur_kernels):
+    """(op, size, ksize, call(engine, img)) for every benchmark case."""
+    for size in sizes:
+        for ksize in blur_kernels:
+            if ksize < size:
+                yield "gaussian_blur", size, ksize, lambda e, img, k=ksize: e._gaussian_blur(img, k)
+        yield "normal_gradients", size, 0, lambda e, img: e._normal_gradients(img, 1.0, 0.6, 0.4)
+        yield "height_blend", size, 0, lambda e, img: e._height_blend(img)
+
+def calibrate(sizes=DEFAULT_SIZES, blur_kernels=DEFAULT_BLUR_KERNELS, repeats=3, tolerance=1e-3):
+    """Benchmarks every candidate backend and returns the resulting DispatchTable."""
+    import cv2
+    import numpy as np
+    from texture_engine import TextureEngine
+
+    engine = TextureEngine()
+    entries = {}
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        img = cv2.GaussianBlur(rng.random((size, size), dtype=np.float32), (5, 5), 0)
+        for op, _, ksize, call in _cases([size], blur_kernels):
+            timings = {}
+            reference = None
+            for backend in OPERATIONS[op]:
+                engine.dispatch = DispatchTable.fixed(backend)
+                result = call(engine, img)
+                # Candidates must agree, or the dispatch would change the output
+                first = result[0] if isinstance(result, tuple) else result
+                if reference is None:
+                    reference = first
+                elif np.abs(first - reference).max() > tolerance:
+                    print(f"  {op} [{backend}] disagrees with {OPERATIONS[op][0]}; skipped")
+                    continue
+                timings[backend] = _time_best(lambda: call(engine, img), repeats)
+            winner = min(timings, key=timings.get)
+            entries.setdefault(op, {})[f"{size_bucket((size, size))}|{kernel_bucket(ksize)}"] = {
+                "backend": winner,
+                "timings": timings,
+            }
+            detail = ", ".join(f"{b} {t * 1000:.1f}ms" for b, t in timings.items())
+            kernel = f" k={ksize}" if ksize else ""
+            print(f"  {op} {size}px{kernel}: {winner} ({detail})")
+    return DispatchTable(entries, _host_info())
+
+def show(table, path):
+    print(f"Dispatch table: {path}")
+    if table.host:
+        print("Host: " + ", ".join(f"{k}={v}" for k, v in table.host.items()))
+    if table.override:
+        print("Override ($TEXTUREGEN_BACKEND): " + ", ".join(f"{k}={v}" for k, v in table.override.items()))
+    if not table.entries:
+        print("Not calibrated; using default backends.")
+    for op, buckets in sorted(table.entries.items()):
+        for bucket_key, entry in sorted(buckets.items(), key=lambda kv: [int(v) for v in kv[0].split("|")]):
+            size, kernel = bucket_key.split("|")
+            kernel = f" k<={kernel}" if kernel != "0" else ""
+            print(f"  {op:<17} <={size}px{kernel}: {entry['backend']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate TextureEngine backends for this host")
+    parser.add_argument("--file", help="Dispatch table path (default: %(default)s)", default=default_table_path())
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Benchmark candidates and save the dispatch table")
+    p_run.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    p_run.add_argument("--kernels", type=int, nargs="+", default=DEFAULT_BLUR_KERNELS, help="Blur kernel sizes")
+    p_run.add_argument("--repeats", type=int, default=3)
+    sub.add_parser("show", help="Print the current dispatch table")
+    sub.add_parser("reset", help="Delete the dispatch table (back to defaults)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        print("Calibrating backends (this may take a minute)...")
+        table = calibrate(args.sizes, args.kernels, args.repeats)
+        print(f"Saved {save_dispatch(table, args.file)}")
+    elif args.command == "show":
+        show(load_dispatch(args.file), args.file)
+    elif args.command == "reset":
+        if os.path.exists(args.file):
+            os.remove(args.file)
+        print(f"Removed {args.file}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+
+# ------------------------------------------------------------------------------
+# EXPORT JOB QUEUE
+# ------------------------------------------------------------------------------
+# One bounded worker thread runs exports one after another. Requests for a job
+# that is already queued or running are coalesced (a queued job takes the newest
+# parameters), and stale jobs are cancelled at the engine's stage boundaries.
+# The queue never touches UI widgets: progress is handed to a `notify` callback,
+# which the GUI marshals onto its own thread.
+
+class JobCancelled(Exception):
+    """Raised inside the worker when the running job was cancelled."""
+
+
+class ExportJob:
+    def __init__(self, image_path, export_dir, resolutions=None, params=None, seamless=False, fold=False):
+        self.image_path = image_path
+        self.export_dir = export_dir
+        self.resolutions = tuple(resolutions) if resolutions else None
+        self.params = params or {}
+        self.seamless = seamless
+        self.fold = fold
+        self.cancelled = threading.Event()
+
+    @property
+    def key(self):
+        return (self.image_path, self.export_dir, self.resolutions, self.seamless, self.fold)
+
+
+class ExportQueue:
+    """
+    Serialises process_pipeline runs on a single worker thread.
+    Seamless jobs run on seamless_engine (periodic boundaries), others on engine.
+    notify(job, event, detail) is called from the worker with event in
+    "started", "stage", "done", "failed" and "cancelled".
+    """
+
+    def __init__(self, engine, notify, seamless_engine=None):
+        self.engine = engine
+        self.seamless_engine = seamless_engine
+        self.notify = notify
+        self._pending = OrderedDict()  # key -> ExportJob
+        self._running = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, name="ExportWorker", daemon=True)
+        self._thread.start()
+
+    def submit(self, image_path, export_dir, resolutions=None, params=None, seamless=False, fold=False):
+        """Queues an export. Returns the queued/running job it was coalesced into, if any."""
+        job = ExportJob(image_path, export_dir, resolutions, params, seamless, fold)
+        with self._cond:
+            running = self._running
+            if running is not None and running.key == job.key and not running.cancelled.is_set():
+                if running.params == job.params:
+                    return running
+                running.cancelled.set()  # Superseded by new parameters
+            if job.key in self._pending:
+                queued = self._pending[job.key]
+                queued.params = job.params
+                return queued
+            self._pending[job.key] = job
+            self._cond.notify()
+        return job
+
+    def cancel_where(self, predicate):
+        """Cancels queued and running jobs matching predicate(job). Returns how many."""
+        count = 0
+        with self._cond:
+            for key, job in list(self._pending.items()):
+                if predicate(job):
+                    del self._pending[key]
+                    job.cancelled.set()
+                    self.notify(job, "cancelled", None)
+                    count += 1
+            if self._running is not None and predicate(self._running):
+                self._running.cancelled.set()  # Honoured at the next stage boundary
+                count += 1
+        return count
+
+    def cancel_all(self):
+        return self.cancel_where(lambda job: True)
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._pending) + (1 if self._running is not None else 0)
+
+    def close(self):
+        self.cancel_all()
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                _, job = self._pending.popitem(last=False)
+                self._running = job
+            self._run(job)
+            with self._cond:
+                self._running = None
+
+    def _run(self, job):
+        def progress(stage):
+            if job.cancelled.is_set():
+                raise JobCancelled()
+            self.notify(job, "stage", stage)
+
+        self.notify(job, "started", None)
+        start_time = time.time()
+        try:
+            engine = self.seamless_engine if job.seamless and self.seamless_engine else self.engine
+            engine.process_pipeline(job.image_path, job.export_dir, progress=progress,
+                                    resolutions=job.resolutions, params=job.params, fold=job.fold)
+        except JobCancelled:
+            self.notify(job, "cancelled", None)
+        except Exception as e:
+            self.notify(job, "failed", e)
+        else:
+            self.notify(job, "done", time.time() - start_time)
@@ -0,0 +1,381 @@
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import hashlib
+import argparse
+import threading
+import multiprocessing
+from texture_engine import TextureEngine, RESOLUTION_LADDER
+
+# ------------------------------------------------------------------------------
+# RENDER-FARM MODE
+# ------------------------------------------------------------------------------
+# A directory on shared storage acts as the job queue. Any number of workers on
+# any number of hosts can point at the same root:
+#
+#   <root>/jobs/<id>.json     job spec, written once by `submit`
+#   <root>/claims/<id>.lock   held by the worker processing the job; created with
+#                             O_CREAT|O_EXCL so only one worker wins, and touched
+#                             every HEARTBEAT seconds while the job runs
+#   <root>/done/<id>.json     journal entry, written atomically after the maps are
+#                             saved; finished jobs are never picked up again
+#   <root>/failed/<id>.json   last error for jobs that raised
+#
+# A claim whose heartbeat is older than STALE_AFTER seconds belongs to a dead
+# worker and is reclaimed. Reclaiming renames the lock first (atomic), so two
+# workers can't both take over the same job. Ages are measured against the file
+# server's clock (a file touched on the share), never the local one, so clock
+# skew between hosts can't make a live claim look stale. A worker whose claim
+# was taken over stops at the next stage boundary and doesn't journal the job.
+
+HEARTBEAT = 10.0
+STALE_AFTER = 60.0
+POLL_INTERVAL = 2.0
+
+def _job_id(image_path, output_dir, resolutions, fold):
+    """
+    Jobs are identified by what they produce: the source (path and current
+    mtime/size) plus every output option. Re-submitting after the source changed,
+    or with other options, queues a new job instead of matching a finished one.
+    """
+    base = os.path.splitext(os.path.basename(image_path))[0]
+    st = os.stat(image_path)
+    key = json.dumps([os.path.abspath(image_path), st.st_mtime_ns, st.st_size,
+                      os.path.abspath(output_dir), sorted(resolutions) if resolutions else None, bool(fold)])
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]
+    return f"{base}-{digest}"
+
+def _write_json_atomic(path, data):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class ClaimLost(Exception):
+    """Raised in a worker whose claim on the job it is processing was reclaimed."""
+
+
+class FarmQueue:
+    """Directory-based job queue shared by every farm worker."""
+
+    def __init__(self, root):
+        self.root = root
+        for sub in ("jobs", "claims", "done", "failed"):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+
+    def _path(self, sub, job_id, ext):
+        return os.path.join(self.root, sub, f"{job_id}{ext}")
+
+    def submit(self, image_path, output_dir, resolutions=None, fold=False):
+        """Adds a job unless the same job (source state and options) is already queued. Returns the job id."""
+        job_id = _job_id(image_path, output_dir, resolutions, fold)
+        path = self._path("jobs", job_id, ".json")
+        if not os.path.exists(path):
+            _write_json_atomic(path, {
+                "id": job_id,
+                "image_path": os.path.abspath(image_path),
+                "output_dir": os.path.abspath(output_dir),
+                "resolutions": list(resolutions) if resolutions else None,
+                "fold": fold,
+            })
+        return job_id
+
+    def listing(self, sub, ext=".json"):
+        """Ids with a file in one queue sub-folder, from a single directory listing."""
+        return {f[:-len(ext)] for f in os.listdir(os.path.join(self.root, sub)) if f.endswith(ext)}
+
+    def job_ids(self):
+        return sorted(self.listing("jobs"))
+
+    def load_job(self, job_id):
+        return _read_json(self._path("jobs", job_id, ".json"))
+
+    def is_done(self, job_id):
+        return os.path.exists(self._path("done", job_id, ".json"))
+
+    def is_failed(self, job_id):
+        return os.path.exists(self._path("failed", job_id, ".json"))
+
+    def claim(self, job_id, worker_id):
+        """Tries to take the job. Returns True if this worker now owns it."""
+        lock = self._path("claims", job_id, ".lock")
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(worker_id)
+        # The job may have finished between our done-check and the claim
+        if self.is_done(job_id):
+            self.release(job_id, worker_id)
+            return False
+        return True
+
+    def owner(self, job_id):
+        try:
+            with open(self._path("claims", job_id, ".lock")) as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def heartbeat(self, job_id, worker_id):
+        """Refreshes the claim. Returns False if the claim was lost to a reclaim."""
+        if self.owner(job_id) != worker_id:
+            return False
+        try:
+            os.utime(self._path("claims", job_id, ".lock"))
+        except OSError:
+            return False
+        return True
+
+    def release(self, job_id, worker_id):
+        if self.owner(job_id) == worker_id:
+            try:
+                os.remove(self._path("claims", job_id, ".lock"))
+            except OSError:
+                pass
+
+    def _share_time(self):
+        """Current time according to the file server that stamps the claim mtimes."""
+        probe = os.path.join(self.root, "claims", f".clock-{uuid.uuid4().hex}")
+        with open(probe, "w"):
+            pass
+        try:
+            return os.stat(probe).st_mtime
+        finally:
+            os.remove(probe)
+
+    def reclaim_if_stale(self, job_id, stale_after=STALE_AFTER):
+        """
+        Removes a claim whose heartbeat has stopped. Returns True if it was removed.
+        If a heartbeat races the reclaim, the claim is given back; should another
+        worker have claimed the job in between, the old owner sees the new lock on
+        its next heartbeat and stops (see FarmWorker._process).
+        """
+        lock = self._path("claims", job_id, ".lock")
+        try:
+            heartbeat = os.stat(lock).st_mtime
+        except OSError:
+            return False
+        age = self._share_time() - heartbeat
+        if age < stale_after:
+            return False
+        tombstone = f"{lock}.{uuid.uuid4().hex}.stale"
+        try:
+            os.rename(lock, tombstone)  # Only one reclaimer can win this
+        except OSError:
+            return False
+        # A heartbeat may have landed between stat() and rename(); give the claim back
+        if self._share_time() - os.stat(tombstone).st_mtime < stale_after:
+            try:
+                os.link(tombstone, lock)
+            except OSError:
+                pass
+            os.remove(tombstone)
+            return False
+        os.remove(tombstone)
+        return True
+
+    def mark_done(self, job_id, worker_id, paths, elapsed):
+        _write_json_atomic(self._path("done", job_id, ".json"), {
+            "id": job_id,
+            "worker": worker_id,
+            "paths": paths,
+            "elapsed": elapsed,
+            "finished": time.time(),
+        })
+        failed = self._path("failed", job_id, ".json")
+        if os.path.exists(failed):
+            os.remove(failed)
+
+    def mark_failed(self, job_id, worker_id, error):
+        _write_json_atomic(self._path("failed", job_id, ".json"), {
+            "id": job_id,
+            "worker": worker_id,
+            "error": str(error),
+            "finished": time.time(),
+        })
+
+    def status(self):
+        counts = {"total": 0, "done": 0, "failed": 0, "running": 0, "queued": 0}
+        done, failed, claimed = self.listing("done"), self.listing("failed"), self.listing("claims", ".lock")
+        for job_id in self.job_ids():
+            counts["total"] += 1
+            if job_id in done:
+                counts["done"] += 1
+            elif job_id in failed:
+                counts["failed"] += 1
+            elif job_id in claimed:
+                counts["running"] += 1
+            else:
+                counts["queued"] += 1
+        return counts
+
+
+class FarmWorker:
+    """Claims and processes jobs until every job in the queue is done or failed."""
+
+    def __init__(self, root, engine=None, heartbeat=HEARTBEAT, stale_after=STALE_AFTER,
+                 poll_interval=POLL_INTERVAL, retry_failed=False):
+        self.queue = FarmQueue(root)
+        if engine is None:
+            engine = TextureEngine()
+            engine.retain_limit = 0  # Each texture is processed once; don't hold on to it
+        self.engine = engine
+        self.heartbeat = heartbeat
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self.retry_failed = retry_failed
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._offset = int(hashlib.sha1(self.worker_id.encode("utf-8")).hexdigest(), 16)
+        self._failed_here = set()  # Retried at most once per run, even with retry_failed
+
+    def _scan(self):
+        """
+        One pass over the queue with a single listing per sub-folder (no per-job
+        stats on the shared mount). Returns (open job ids, claimed job ids). Open
+        jobs are rotated to a per-worker offset so workers don't all race for the
+        same first job.
+        """
+        done, failed = self.queue.listing("done"), self.queue.listing("failed")
+        open_jobs = [job_id for job_id in self.queue.job_ids()
+                     if job_id not in done and job_id not in self._failed_here
+                     and (self.retry_failed or job_id not in failed)]
+        if open_jobs:
+            start = self._offset % len(open_jobs)
+            open_jobs = open_jobs[start:] + open_jobs[:start]
+        return open_jobs, self.queue.listing("claims", ".lock")
+
+    def _try(self, job_id, claimed):
+        """Claims and processes one job from a scan. Returns True if it was processed."""
+        if job_id in claimed and not self.queue.reclaim_if_stale(job_id, self.stale_after):
+            return False
+        # claim() re-checks done/, so a scan that went stale can't redo a finished job
+        if not self.queue.claim(job_id, self.worker_id):
+            return False
+        self._process(job_id)
+        return True
+
+    def run_once(self):
+        """Processes at most one job. Returns True if work was done."""
+        open_jobs, claimed = self._scan()
+        return any(self._try(job_id, claimed) for job_id in open_jobs)
+
+    def run(self):
+        """Works until the queue is drained. Returns the number of jobs processed."""
+        processed = 0
+        while True:
+            open_jobs, claimed = self._scan()
+            if not open_jobs:
+                return processed
+            # Work through the whole scan before listing the queue again
+            worked = 0
+            for job_id in open_jobs:
+                worked += self._try(job_id, claimed)
+            processed += worked
+            if not worked:
+                # Remaining jobs are held by other workers; wait for them to finish or go stale
+                time.sleep(self.poll_interval)
+
+    def _process(self, job_id):
+        job = self.queue.load_job(job_id)
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def beat():
+            while not stop.wait(self.heartbeat):
+                if not self.queue.heartbeat(job_id, self.worker_id):
+                    lost.set()
+                    return
+
+        def progress(stage):
+            # Called at every pipeline stage; stops work another worker now owns
+            if lost.is_set():
+                raise ClaimLost(job_id)
+
+        beater = threading.Thread(target=beat, daemon=True)
+        beater.start()
+        print(f"[{self.worker_id}] Processing {job_id}")
+        start_time = time.time()
+        try:
+            os.makedirs(job["output_dir"], exist_ok=True)
+            paths = self.engine.process_pipeline(job["image_path"], job["output_dir"], progress=progress,
+                                                 resolutions=job.get("resolutions"), fold=job.get("fold", False))
+            progress("Finished")
+            self.queue.mark_done(job_id, self.worker_id, paths, time.time() - start_time)
+        except ClaimLost:
+            print(f"[{self.worker_id}] Lost claim on {job_id}; leaving it to the new owner")
+        except Exception as e:
+            print(f"[{self.worker_id}] ❌ {job_id} failed: {e}")
+            self.queue.mark_failed(job_id, self.worker_id, e)
+            self._failed_here.add(job_id)
+        finally:
+            stop.set()
+            beater.join()
+            self.queue.release(job_id, self.worker_id)
+
+
+def _run_worker(root, kwargs):
+    FarmWorker(root, **kwargs).run()
+
+def run_local_workers(root, count, **kwargs):
+    """Runs `count` worker processes on this host against the shared root."""
+    procs = [multiprocessing.Process(target=_run_worker, args=(root, kwargs)) for _ in range(count)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TextureGen Pro render-farm queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_submit = sub.add_parser("submit", help="Queue source images")
+    p_submit.add_argument("root", help="Shared queue directory")
+    p_submit.add_argument("images", nargs="+")
+    p_submit.add_argument("--output", required=True, help="Output directory (shared storage)")
+    p_submit.add_argument("--ladder", action="store_true", help="Export the 4K/2K/1K/512 resolution ladder")
+    p_submit.add_argument("--fold", action="store_true", help="Fold uniform/duplicate maps into constants")
+
+    p_work = sub.add_parser("work", help="Process jobs until the queue is drained")
+    p_work.add_argument("root")
+    p_work.add_argument("--workers", type=int, default=1, help="Worker processes on this host")
+    p_work.add_argument("--retry-failed", action="store_true")
+
+    p_status = sub.add_parser("status", help="Show queue progress")
+    p_status.add_argument("root")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "submit":
+        queue = FarmQueue(args.root)
+        resolutions = RESOLUTION_LADDER if args.ladder else None
+        for image in args.images:
+            job_id = queue.submit(image, args.output, resolutions, args.fold)
+            print(f"Already done {job_id}" if queue.is_done(job_id) else f"Queued {job_id}")
+    elif args.command == "work":
+        if args.workers > 1:
+            run_local_workers(args.root, args.workers, retry_failed=args.retry_failed)
+        else:
+            FarmWorker(args.root, retry_failed=args.retry_failed).run()
+    elif args.command == "status":
+        counts = FarmQueue(args.root).status()
+        print(" | ".join(f"{k}: {v}" for k, v in counts.items()))
+    return 0
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
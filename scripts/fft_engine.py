@@ -0,0 +1,122 @@
+from collections import OrderedDict
+import cv2
+import numpy as np
+from texture_engine import TextureEngine
+
+# ------------------------------------------------------------------------------
+# FREQUENCY-DOMAIN ENGINE (PERIODIC / SEAMLESS)
+# ------------------------------------------------------------------------------
+# Every blur, Sobel and Laplacian the generators use is a linear filter, i.e. a
+# multiplication in the frequency domain. This engine takes ONE forward real FFT
+# of the grayscale (cached while that image is in use) and applies each filter
+# as a multiplication by its transfer function, followed by the output's
+# inverse transform. Filter cost no longer depends on kernel radius.
+#
+# Every filter is a sum of separable terms, so only the 1D transfer functions
+# (one row and one column per kernel) are cached. The full-resolution 2D product
+# is formed on the fly while applying and never kept: caching it would hold tens
+# of bytes per pixel for every image size and slider value seen.
+#
+# The FFT treats the image as periodic, so every map wraps around its edges:
+# the output tiles seamlessly, with no padding copies. Away from the borders
+# the maps match TextureEngine's to float tolerance.
+#
+# Notes:
+#   - delight_albedo filters the LAB luminance, not the grayscale, so the Albedo
+#     map takes its own forward transform.
+#   - AO keeps one inverse transform per scale, because each scale's valley mask
+#     is clipped (non-linear) before the scales are summed.
+
+SPECTRUM_CACHE_SIZE = 2
+TRANSFER_CACHE_SIZE = 64
+
+def _transfer_1d(kernel, n, real):
+    """Frequency response of a 1D correlation kernel (cv2 anchor = centre) on a length-n circle."""
+    h = np.zeros(n, dtype=np.float64)
+    center = len(kernel) // 2
+    # cv2 filters correlate: out[x] = sum k[i] * img[x + i - center], i.e. a
+    # circular convolution with h[center - i] = k[i]. Kernels longer than the
+    # image wrap around onto themselves.
+    np.add.at(h, (center - np.arange(len(kernel))) % n, np.asarray(kernel, dtype=np.float64).ravel())
+    return np.fft.rfft(h) if real else np.fft.fft(h)
+
+
+class FFTTextureEngine(TextureEngine):
+    """TextureEngine whose linear filters run as products with cached FFT transfer functions."""
+
+    def __init__(self):
+        super().__init__()
+        self._spectra = OrderedDict()  # id(array) -> (array, spectrum)
+        self._transfers = OrderedDict()  # (kernel taps, length, real) -> 1D transfer
+        # Periodic filters wrap around the edges, so a region can't be regenerated alone
+        self.incremental = False
+
+    # --- Spectra & Transfer Functions ---
+
+    def _spectrum(self, img):
+        """Forward real FFT of img, cached while the same array is in use."""
+        entry = self._spectra.get(id(img))
+        if entry is not None and entry[0] is img:
+            self._spectra.move_to_end(id(img))
+            return entry[1]
+        spectrum = np.fft.rfft2(img)
+        # Holding a reference to img keeps its id from being reused
+        self._spectra[id(img)] = (img, spectrum)
+        while len(self._spectra) > SPECTRUM_CACHE_SIZE:
+            self._spectra.popitem(last=False)
+        return spectrum
+
+    def _transfer(self, kernel, n, real):
+        """_transfer_1d, cached by kernel taps (LRU, so slider sweeps don't grow it)."""
+        taps = np.asarray(kernel, dtype=np.float64).ravel()
+        key = (taps.tobytes(), n, real)
+        transfer = self._transfers.get(key)
+        if transfer is None:
+            transfer = self._transfers[key] = _transfer_1d(taps, n, real)
+            while len(self._transfers) > TRANSFER_CACHE_SIZE:
+                self._transfers.popitem(last=False)
+        else:
+            self._transfers.move_to_end(key)
+        return transfer
+
+    def _separable_transfer(self, shape, kernel_x, kernel_y):
+        """(column, row) 1D transfer functions of sepFilter2D(kernel_x, kernel_y) for an image of `shape`."""
+        h, w = shape[:2]
+        return self._transfer(kernel_y, h, real=False), self._transfer(kernel_x, w, real=True)
+
+    def _apply(self, img, terms, constant=0.0):
+        """
+        One inverse transform of img's spectrum multiplied by the sum of separable
+        terms [(column, row) transfers], plus `constant` times the identity.
+        """
+        spectrum = self._spectrum(img)
+        filtered = spectrum * constant
+        for transfer_y, transfer_x in terms:
+            term = spectrum * transfer_y.astype(spectrum.dtype)[:, None]
+            term *= transfer_x.astype(spectrum.dtype)
+            filtered += term
+        return np.fft.irfft2(filtered, s=img.shape[:2]).astype(np.float32)
+
+    # --- Linear filter primitives (see TextureEngine) ---
+
+    def _gaussian_blur(self, img, ksize):
+        g = cv2.getGaussianKernel(ksize, 0, ktype=cv2.CV_64F).ravel()
+        return self._apply(img, [self._separable_transfer(img.shape, g, g)])
+
+    def _laplacian(self, img_gray):
+        # cv2.Laplacian(ksize=1) = [1,-2,1] along x + [1,-2,1] along y
+        d2 = [1.0, -2.0, 1.0]
+        delta = [1.0]
+        return self._apply(img_gray, [self._separable_transfer(img_gray.shape, d2, delta),
+                                      self._separable_transfer(img_gray.shape, delta, d2)])
+
+    def _normal_gradients(self, img_gray, strength, detail_weight, shape_weight):
+        (dx_fine, sm_fine), (dx_shape, sm_shape) = self._normal_kernels(strength, detail_weight, shape_weight)
+        shape = img_gray.shape[:2]
+        terms_x = [self._separable_transfer(shape, dx_fine, sm_fine), self._separable_transfer(shape, dx_shape, sm_shape)]
+        terms_y = [self._separable_transfer(shape, sm_fine, dx_fine), self._separable_transfer(shape, sm_shape, dx_shape)]
+        return self._apply(img_gray, terms_x), self._apply(img_gray, terms_y)
+
+    def _height_blend(self, img_gray):
+        kx, ky = self._height_kernel()
+        return self._apply(img_gray, [self._separable_transfer(img_gray.shape, kx, ky)], constant=0.4)
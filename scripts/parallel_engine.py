@@ -0,0 +1,267 @@
+import os
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+import cv2
+import numpy as np
+from texture_engine import TextureEngine, MAP_NAMES, MAP_GENERATORS, map_halo
+
+# ------------------------------------------------------------------------------
+# SHARED-MEMORY PROCESS POOL BACKEND
+# ------------------------------------------------------------------------------
+# The decoded image and its grayscale are written once into shared memory.
+# Workers attach to the blocks by name and write their maps (or horizontal
+# bands of maps) straight into shared output buffers, so no image data is
+# ever pickled. Only tiny task tuples travel through the pool's pipes.
+
+# Bands are generated with map_halo() rows of context on each side, so each band
+# matches a full-image run exactly.
+
+# Output channels per map (everything else is single-channel)
+_CHANNELS = {"Albedo": 3, "Normal": 3}
+
+MIN_BAND_ROWS = 64
+
+# --- Worker side ---
+
+_worker_engine = None
+_worker_blocks = {}  # shm name -> SharedMemory attached in this worker
+
+def _init_worker(engine_cls):
+    global _worker_engine
+    _worker_engine = engine_cls()
+
+def _open_shared(shm_name):
+    """Attaches to an existing block. The parent owns (and unlinks) every block."""
+    try:
+        return shared_memory.SharedMemory(name=shm_name, track=False)  # Python 3.13+
+    except TypeError:
+        # Older Pythons register the block with the resource tracker, which is
+        # shared with the parent (see SharedMemoryPool.__init__), so no double unlink.
+        return shared_memory.SharedMemory(name=shm_name)
+
+def _attach(layout):
+    """Maps the current image's shared blocks into this worker. Returns name -> ndarray."""
+    wanted = {shm_name for shm_name, _ in layout.values()}
+    # Drop blocks from previous images so their memory can be released
+    for shm_name in list(_worker_blocks):
+        if shm_name not in wanted:
+            _worker_blocks.pop(shm_name).close()
+
+    views = {}
+    for key, (shm_name, shape) in layout.items():
+        shm = _worker_blocks.get(shm_name)
+        if shm is None:
+            shm = _open_shared(shm_name)
+            _worker_blocks[shm_name] = shm
+        views[key] = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+    return views
+
+def _run_task(task):
+    map_name, y0, y1, kwargs, layout = task
+    views = _attach(layout)
+    method, source_key, _ = MAP_GENERATORS[map_name]
+    source = views[source_key]
+    out = views[map_name]
+
+    halo = map_halo(map_name, kwargs)
+    if halo is None or (y0 == 0 and y1 == source.shape[0]):
+        out[...] = getattr(_worker_engine, method)(source, **kwargs)
+        return map_name, y0, y1
+
+    # Generate the band plus its halo, then keep only the band's own rows
+    top = max(0, y0 - halo)
+    bottom = min(source.shape[0], y1 + halo)
+    _worker_engine._dispatch_shape = source.shape
+    try:
+        band = getattr(_worker_engine, method)(source[top:bottom], **kwargs)
+    finally:
+        _worker_engine._dispatch_shape = None
+    out[y0:y1] = band[y0 - top:y1 - top]
+    return map_name, y0, y1
+
+# --- Parent side ---
+
+class SharedMemoryPool:
+    """
+    Long-lived process pool whose workers read inputs from and write outputs to
+    shared memory. Blocks are reused while image sizes stay the same.
+    """
+
+    def __init__(self, workers=None, engine_cls=TextureEngine):
+        self.workers = workers or os.cpu_count() or 1
+        if os.name == "posix":
+            # Start the tracker before forking so workers inherit it instead of
+            # each starting their own, which would unlink blocks when a worker exits.
+            resource_tracker.ensure_running()
+        self._pool = multiprocessing.get_context().Pool(
+            self.workers, initializer=_init_worker, initargs=(engine_cls,)
+        )
+        self._blocks = {}  # key -> (SharedMemory, shape)
+
+    def _block(self, key, shape):
+        """Returns a float32 view of a shared block, (re)allocating it if the shape changed."""
+        entry = self._blocks.get(key)
+        if entry is None or entry[1] != shape:
+            if entry is not None:
+                self._release(key)
+            nbytes = int(np.prod(shape)) * np.dtype(np.float32).itemsize
+            shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+            self._blocks[key] = (shm, shape)
+        return self.view(key)
+
+    def _release(self, key):
+        shm, _ = self._blocks.pop(key)
+        shm.close()
+        shm.unlink()
+
+    def view(self, key):
+        """Returns a float32 view of an existing shared block, or None."""
+        entry = self._blocks.get(key)
+        if entry is None:
+            return None
+        shm, shape = entry
+        return np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+
+    def _layout(self):
+        return {key: (shm.name, shape) for key, (shm, shape) in self._blocks.items()}
+
+    def load_image(self, image_path):
+        """Decodes straight into the shared 'raw' buffer and fills the shared 'gray' buffer."""
+        img = cv2.imread(image_path)
+        if img is None:
+            raise ValueError(f"Could not load image: {image_path}")
+        h, w = img.shape[:2]
+        raw = self._block("raw", (h, w, 3))
+        np.divide(img[..., ::-1], np.float32(255.0), out=raw)  # BGR -> RGB, 0-1 float
+        self._fill_gray(raw)
+        return raw
+
+    def set_image(self, img_rgb):
+        """Copies an already decoded RGB float image into shared memory."""
+        raw = self._block("raw", img_rgb.shape)
+        raw[...] = img_rgb
+        self._fill_gray(raw)
+        return raw
+
+    def _fill_gray(self, raw):
+        gray = self._block("gray", raw.shape[:2])
+        result = cv2.cvtColor(raw, cv2.COLOR_RGB2GRAY, dst=gray)
+        if result is not gray:
+            gray[...] = result
+
+    def _bands(self, height, halo):
+        if halo is None:
+            return [(0, height)]
+        count = max(1, min(self.workers, height // max(MIN_BAND_ROWS, 2 * halo)))
+        edges = np.linspace(0, height, count + 1).astype(int)
+        return list(zip(edges[:-1], edges[1:]))
+
+    def generate(self, map_names=MAP_NAMES, map_kwargs=None):
+        """
+        Generates maps for the current shared image in parallel.
+        Returns name -> ndarray views onto shared memory; they stay valid until the
+        next image is loaded or the pool is closed, so copy them to keep them longer.
+        """
+        map_kwargs = map_kwargs or {}
+        h, w = self._blocks["gray"][1]
+        for name in map_names:
+            channels = _CHANNELS.get(name, 1)
+            self._block(name, (h, w, channels) if channels > 1 else (h, w))
+
+        layout = self._layout()
+        tasks = []
+        for name in map_names:
+            kwargs = map_kwargs.get(name, {})
+            for y0, y1 in self._bands(h, map_halo(name, kwargs)):
+                tasks.append((name, int(y0), int(y1), kwargs, layout))
+
+        # Unbandable maps first so they don't become the tail of the run
+        tasks.sort(key=lambda t: t[2] - t[1], reverse=True)
+        for _ in self._pool.imap_unordered(_run_task, tasks):
+            pass
+
+        return {name: self.view(name) for name in map_names}
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+        for key in list(self._blocks):
+            self._release(key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParallelTextureEngine(TextureEngine):
+    """
+    TextureEngine that spreads map generation over a SharedMemoryPool.
+    The pool is created lazily and kept alive across images; call close() when done.
+    """
+
+    def __init__(self, workers=None):
+        super().__init__()
+        self.workers = workers
+        self._shared_pool = None
+        # Results are views onto shared buffers that the next image overwrites,
+        # so they can't be retained between process_pipeline calls.
+        self.retain_limit = 0
+
+    @property
+    def pool(self):
+        if self._shared_pool is None:
+            self._shared_pool = SharedMemoryPool(self.workers, TextureEngine)
+        return self._shared_pool
+
+    def _load_image_as_float(self, image_path):
+        return self.pool.load_image(image_path)
+
+    def generate_maps(self, raw_img, progress=None, maps=None, params=None, gray=None, on_map=None):
+        if not self._is_shared(raw_img):
+            raw_img = self.pool.set_image(raw_img)
+        maps = maps or MAP_NAMES
+        self._stage(progress, f"Generating maps on {self.pool.workers} worker processes...")
+        results = self.pool.generate(maps, {name: self.map_params(name, params) for name in maps})
+        if on_map:
+            # Bands of every map are scheduled together, so all maps finish at once
+            for map_name, result in results.items():
+                on_map(map_name, result)
+        return results
+
+    def _refresh_dispatch(self):
+        reloaded = super()._refresh_dispatch()
+        if reloaded:
+            # Workers loaded the old table when they started; restart them
+            self.close()
+        return reloaded
+
+    def _to_grayscale(self, img_rgb):
+        # The pool already filled the shared gray block when it took the image
+        if self._shared_pool is not None and self._is_shared(img_rgb):
+            return self.pool.view("gray")
+        return super()._to_grayscale(img_rgb)
+
+    def _is_shared(self, arr):
+        raw = self.pool.view("raw")
+        return raw is not None and arr.ctypes.data == raw.ctypes.data and arr.shape == raw.shape
+
+    def close(self):
+        if self._shared_pool is not None:
+            self._shared_pool.close()
+            self._shared_pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    import sys
+    multiprocessing.freeze_support()
+    with ParallelTextureEngine() as engine:
+        for path in sys.argv[1:]:
+            engine.process_pipeline(path, os.path.dirname(path) or ".")
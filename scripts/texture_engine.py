@@ -1,6 +1,64 @@
+import os
+import json
+import hashlib
+from collections import OrderedDict
 import cv2
 import numpy as np
 from PIL import Image
+from calibration import load_dispatch, default_table_path
+
+# Output maps in write order. Grayscale maps are saved as single-channel PNGs.
+MAP_NAMES = ["Albedo", "Normal", "Roughness", "AO", "Displacement"]
+GRAY_MAPS = {"Roughness", "AO", "Displacement"}
+
+# Dependency graph: each map is produced by one engine method from one source
+# ("raw" RGB for Albedo, the grayscale for data maps) and its own parameters.
+# A map (and its files) only needs regenerating when its source or parameters change.
+MAP_GENERATORS = {
+    "Albedo": ("delight_albedo", "raw", "Delighting Albedo..."),
+    "Normal": ("generate_normal_map", "gray", "Generating Normals..."),
+    "Roughness": ("generate_roughness_map", "gray", "Generating Roughness..."),
+    "AO": ("generate_ao_map", "gray", "Generating AO..."),
+    "Displacement": ("generate_height_map", "gray", "Generating Height..."),
+}
+
+# Parameters (with defaults) each map depends on, passed to its generator method.
+MAP_DEFAULTS = {
+    "Albedo": {"shadow_strength": 0.5, "highlight_strength": 0.8},
+    "Normal": {"strength": 1.0, "detail_weight": 0.6, "shape_weight": 0.4},
+    "Roughness": {"contrast": 1.2, "brightness": 0.0, "invert": True},
+    "AO": {"radius": 20, "strength": 1.5},
+    "Displacement": {"low_freq_boost": True},
+}
+
+def map_halo(map_name, kwargs):
+    """
+    Pixels of context a map needs on each side of a region for that region to match
+    a full-image run exactly (sum of its filter radii), or None if the map depends on
+    whole-image statistics. kwargs are the map's full parameters (see map_params).
+    """
+    if map_name == "Normal":
+        return 4 + 2  # 9x9 Gaussian, then 5x5 Sobel
+    if map_name == "Roughness":
+        return 1  # 3x3 Laplacian
+    if map_name == "AO":
+        return (int(kwargs["radius"] * 2.0) | 1) // 2  # Largest AO blur
+    if map_name == "Displacement":
+        return 15 if kwargs["low_freq_boost"] else 0  # 31x31 Gaussian
+    return None  # Albedo: delighting uses the image-wide mean luminance
+
+# Maps whose values stay within this range of a constant are folded into a scalar
+# material parameter instead of being written (see TextureEngine.fold_maps).
+FOLD_TOLERANCE = 2.0 / 255.0
+
+# Edited sources are compared with the previous decode in blocks of this many pixels;
+# only blocks that changed (grown by each map's halo) are regenerated.
+INCREMENTAL_BLOCK = 64
+# Above this fraction of the image, patching costs about as much as a full rerun.
+INCREMENTAL_MAX_AREA = 0.5
+
+# Default export ladder (longest edge in pixels) for multi-platform shipping.
+RESOLUTION_LADDER = [4096, 2048, 1024, 512]
 
 class TextureEngine:
     """
@@ -9,7 +67,28 @@ class TextureEngine:
     """
     
     def __init__(self):
-        pass
+        # Composed filter kernels, keyed by the parameters they were built from
+        self._kernel_cache = {}
+        
+        # Per-host choice of filter implementation (see calibration.py). When only a
+        # region is generated, _dispatch_shape holds the full image shape so the
+        # region uses the same backend (and bit-identical output) as a full run.
+        self.dispatch = load_dispatch()
+        self._dispatch_shape = None
+        # Table file stamp the dispatch was loaded from; a re-calibration is picked
+        # up by the next process_pipeline (see _refresh_dispatch)
+        self._loaded_dispatch = (self.dispatch, self._dispatch_stamp())
+        
+        # Retained intermediates for the most recent sources (image path -> entry),
+        # so a re-export only recomputes maps whose parameters changed.
+        self.retain_limit = 2
+        self._retained = OrderedDict()
+        # When a retained source is edited, regenerate only the changed regions of its maps
+        self.incremental = True
+        # Output target -> what was written there (source, parameters, file mtimes)
+        self._written = {}
+        # (map name, shape, content hash) -> file already holding those pixels
+        self._content_index = {}
 
     def _load_image_as_float(self, image_path):
         """Loads image, converts to 0-1 float, handles high-res."""
@@ -37,7 +116,7 @@ class TextureEngine:
         # We use a massive blur to find the overall light gradient
         h, w = l_channel.shape[:2]
         kernel_size = int(min(h, w) * 0.05) | 1 # ~5% of image size, odd number
-        lighting_field = cv2.GaussianBlur(l_channel, (kernel_size, kernel_size), 0)
+        lighting_field = self._gaussian_blur(l_channel, kernel_size)
 
         # 3. Flatten the lighting (High Pass)
         # Result = L / Lighting * Average_L
@@ -58,25 +137,13 @@ class TextureEngine:
         Generates a high-quality normal map using Frequency Separation.
         Combines fine details (pores) and large shapes (structure) separately.
         """
-        # Frequency Separation
-        # 1. Micro-Details (High Freq)
-        # Sobel on raw image captures noise and pores
-        sobel_x_fine = cv2.Sobel(img_gray, cv2.CV_32F, 1, 0, ksize=3)
-        sobel_y_fine = cv2.Sobel(img_gray, cv2.CV_32F, 0, 1, ksize=3)
-        
-        # 2. Macro-Structure (Low Freq)
-        # Blur first, then Sobel to capture big slopes without noise
-        blurred = cv2.GaussianBlur(img_gray, (9, 9), 0)
-        sobel_x_shape = cv2.Sobel(blurred, cv2.CV_32F, 1, 0, ksize=5)
-        sobel_y_shape = cv2.Sobel(blurred, cv2.CV_32F, 0, 1, ksize=5)
-        
-        # 3. Blend Frequencies
-        sobel_x = (sobel_x_fine * detail_weight) + (sobel_x_shape * shape_weight)
-        sobel_y = (sobel_y_fine * detail_weight) + (sobel_y_shape * shape_weight)
-        
-        # Apply Global Strength
-        sobel_x *= -strength * 4.0 # Boost factor for visibility
-        sobel_y *= -strength * 4.0
+        # Frequency Separation, with every linear step folded into precomposed kernels:
+        # 1. Micro-Details (High Freq): 3x3 Sobel on the raw image (pores, noise)
+        # 2. Macro-Structure (Low Freq): 9x9 Gaussian then 5x5 Sobel (big slopes)
+        # 3. Blend weights and global strength are baked into the kernel taps.
+        # The blend is a sum of two separable kernels (rank 2), so each derivative
+        # axis costs two separable passes instead of Sobel + Gaussian + Sobel + blend.
+        sobel_x, sobel_y = self._normal_gradients(img_gray, strength, detail_weight, shape_weight)
         
         # 4. Construct Vectors
         # Normal = normalize(x, y, 1.0)
@@ -90,12 +157,109 @@ class TextureEngine:
         normal_map = cv2.merge([nx, ny, nz])
         return np.clip(normal_map, 0.0, 1.0)
 
+    # --- Linear filter primitives ---
+    # Every blur/derivative the generators use goes through these, so alternative
+    # engines (e.g. fft_engine) only need to override the filtering itself.
+    # Each has a "separable" and a "filter2d" implementation (identical output,
+    # including borders); self.dispatch picks the faster one for the image and
+    # kernel size on this host. filter2D switches to a DFT for large kernels.
+
+    def _gaussian_blur(self, img, ksize):
+        if self.dispatch.backend("gaussian_blur", self._dispatch_shape or img.shape, ksize) == "filter2d":
+            return cv2.filter2D(img, -1, self._kernel_2d(("gauss2d", ksize), self._gaussian_taps(ksize)))
+        return cv2.GaussianBlur(img, (ksize, ksize), 0)
+
+    def _laplacian(self, img_gray):
+        return cv2.Laplacian(img_gray, cv2.CV_32F)
+
+    def _normal_gradients(self, img_gray, strength, detail_weight, shape_weight):
+        """Blended, strength-scaled X/Y slopes for generate_normal_map (see _normal_kernels)."""
+        kernels = self._normal_kernels(strength, detail_weight, shape_weight)
+        (dx_fine, sm_fine), (dx_shape, sm_shape) = kernels
+        
+        if self.dispatch.backend("normal_gradients", self._dispatch_shape or img_gray.shape) == "filter2d":
+            kx = self._kernel_2d(("normal2d", strength, detail_weight, shape_weight), *kernels)
+            return cv2.filter2D(img_gray, cv2.CV_32F, kx), cv2.filter2D(img_gray, cv2.CV_32F, kx.T)
+        
+        sobel_x = cv2.sepFilter2D(img_gray, cv2.CV_32F, dx_fine, sm_fine)
+        sobel_x += cv2.sepFilter2D(img_gray, cv2.CV_32F, dx_shape, sm_shape)
+        sobel_y = cv2.sepFilter2D(img_gray, cv2.CV_32F, sm_fine, dx_fine)
+        sobel_y += cv2.sepFilter2D(img_gray, cv2.CV_32F, sm_shape, dx_shape)
+        return sobel_x, sobel_y
+
+    def _height_blend(self, img_gray):
+        """0.4 * gray + 0.6 * blur(31x31), with the 0.6 baked into the blur taps."""
+        kx, ky = self._height_kernel()
+        if self.dispatch.backend("height_blend", self._dispatch_shape or img_gray.shape) == "filter2d":
+            kernel = self._kernel_cache.get(("height2d",))
+            if kernel is None:
+                kernel = self._kernel_2d(("height2d_blur",), (kx, ky)).copy()
+                kernel[len(ky) // 2, len(kx) // 2] += 0.4
+                self._kernel_cache[("height2d",)] = kernel
+            return cv2.filter2D(img_gray, cv2.CV_32F, kernel)
+        height = cv2.sepFilter2D(img_gray, cv2.CV_32F, kx, ky)
+        return cv2.scaleAdd(img_gray, 0.4, height)
+
+    def _gaussian_taps(self, ksize):
+        g = cv2.getGaussianKernel(ksize, 0, ktype=cv2.CV_64F).ravel()
+        return (g, g)
+
+    def _kernel_2d(self, key, *pairs):
+        """Sum of separable (kernel_x, kernel_y) pairs as one centred 2D kernel, cached under key."""
+        kernel = self._kernel_cache.get(key)
+        if kernel is None:
+            size_y = max(len(ky) for _, ky in pairs)
+            size_x = max(len(kx) for kx, _ in pairs)
+            kernel = np.zeros((size_y, size_x), dtype=np.float64)
+            for kx, ky in pairs:
+                oy = (size_y - len(ky)) // 2
+                ox = (size_x - len(kx)) // 2
+                kernel[oy:oy + len(ky), ox:ox + len(kx)] += np.outer(ky, kx)
+            kernel = kernel.astype(np.float32)
+            self._kernel_cache[key] = kernel
+        return kernel
+
+    def _normal_kernels(self, strength, detail_weight, shape_weight):
+        """
+        Builds (and caches) the 1D kernel pairs for generate_normal_map:
+        ((derivative, smoothing) for fine detail, (derivative, smoothing) for shape).
+        Blur-then-Sobel is composed by convolving the 1D taps; the blend weights and
+        strength (with the x4 visibility boost) are folded into the derivative taps.
+        """
+        key = ("normal", strength, detail_weight, shape_weight)
+        kernels = self._kernel_cache.get(key)
+        if kernels is None:
+            gain = -strength * 4.0 # Boost factor for visibility
+            d3, s3 = cv2.getDerivKernels(1, 0, 3, normalize=False)
+            d5, s5 = cv2.getDerivKernels(1, 0, 5, normalize=False)
+            g9 = cv2.getGaussianKernel(9, 0, ktype=cv2.CV_64F)
+            
+            dx_fine = d3.ravel() * (detail_weight * gain)
+            sm_fine = s3.ravel()
+            dx_shape = np.convolve(d5.ravel(), g9.ravel()) * (shape_weight * gain)
+            sm_shape = np.convolve(s5.ravel(), g9.ravel())
+            
+            kernels = tuple((dx.astype(np.float32), sm.astype(np.float32))
+                            for dx, sm in [(dx_fine, sm_fine), (dx_shape, sm_shape)])
+            self._kernel_cache[key] = kernels
+        return kernels
+
+    def _height_kernel(self, ksize=31, blur_weight=0.6):
+        """Gaussian taps for generate_height_map with the blur's blend weight folded in."""
+        key = ("height", ksize, blur_weight)
+        kernel = self._kernel_cache.get(key)
+        if kernel is None:
+            g = cv2.getGaussianKernel(ksize, 0, ktype=cv2.CV_64F).ravel()
+            kernel = ((g * blur_weight).astype(np.float32), g.astype(np.float32))
+            self._kernel_cache[key] = kernel
+        return kernel
+
     def generate_roughness_map(self, img_gray, contrast=1.2, brightness=0.0, invert=True):
         """
         Smart Roughness. Detects edges to make cracks/crevices rougher (or shinier).
         """
         # 1. Curvature Detection (Edges often behave differently than flat surfaces)
-        laplacian = cv2.Laplacian(img_gray, cv2.CV_32F)
+        laplacian = self._laplacian(img_gray)
         curvature = np.abs(laplacian)
         
         # 2. Base Roughness from Luminance (Darker = Smoother usually, or vice versa)
@@ -119,7 +283,7 @@ class TextureEngine:
         Darkens crevices.
         """
         # Invert image (0=Deep, 1=High)
-        height = img_gray.copy()
+        height = img_gray # Read-only below, no copy needed
         
         # High-pass approach for AO:
         # The difference between the pixel and the local average tells us if it's a valley.
@@ -130,7 +294,7 @@ class TextureEngine:
         # Multi-scale loop
         for r in [radius * 0.5, radius, radius * 2.0]:
             k = int(r) | 1
-            blurred = cv2.GaussianBlur(height, (k, k), 0)
+            blurred = self._gaussian_blur(height, k)
             # Difference: Positive if pixel is higher than average (Peak), Negative if lower (Valley)
             diff = height - blurred
             # We only care about Valleys (negative diff)
@@ -148,45 +312,523 @@ class TextureEngine:
         """
         if low_freq_boost:
             # Boost low frequencies to give "body" to the displacement
-            blurred = cv2.GaussianBlur(img_gray, (31, 31), 0)
-            height = cv2.addWeighted(img_gray, 0.4, blurred, 0.6, 0)
+            height = self._height_blend(img_gray)
         else:
             height = img_gray
             
         return np.clip(height, 0.0, 1.0)
 
-    def process_pipeline(self, image_path, output_dir="."):
-        """Runs the full suite."""
-        print(f"Loading {image_path}...")
-        raw_img = self._load_image_as_float(image_path)
-        
-        # 1. Delighting (Create Base Color)
-        print("Delighting Albedo...")
-        albedo = self.delight_albedo(raw_img)
-        
-        # 2. Grayscale conversion for data maps
-        gray = self._to_grayscale(raw_img) # Use original detail for data maps
-        
-        # 3. Generate Maps
-        print("Generating Normals...")
-        normal = self.generate_normal_map(gray)
-        print("Generating Roughness...")
-        rough = self.generate_roughness_map(gray)
-        print("Generating AO...")
-        ao = self.generate_ao_map(gray)
-        print("Generating Height...")
-        height = self.generate_height_map(gray)
-        
-        # 4. Save
-        import os
+    def _stage(self, progress, text):
+        """Reports a stage boundary. progress(text) may raise to abort the run."""
+        print(text)
+        if progress:
+            progress(text)
+
+    def map_params(self, map_name, params=None):
+        """Full parameter set for one map: MAP_DEFAULTS overridden by params[map_name]."""
+        merged = dict(MAP_DEFAULTS[map_name])
+        if params and map_name in params:
+            merged.update(params[map_name])
+        return merged
+
+    def generate_maps(self, raw_img, progress=None, maps=None, params=None, gray=None, on_map=None):
+        """
+        Generates PBR maps for a decoded RGB float image.
+        maps: subset of MAP_NAMES to generate (default: all).
+        params: {map name: {parameter: value}} overrides of MAP_DEFAULTS.
+        gray: precomputed grayscale of raw_img, if available.
+        on_map(map_name, result) is called as soon as each map is finished.
+        Returns a dict keyed by map name.
+        """
+        results = {}
+        for map_name in maps or MAP_NAMES:
+            method, source, stage = MAP_GENERATORS[map_name]
+            self._stage(progress, stage)
+            if source == "raw":
+                src = raw_img
+            else:
+                if gray is None:
+                    gray = self._to_grayscale(raw_img) # Use original detail for data maps
+                src = gray
+            results[map_name] = getattr(self, method)(src, **self.map_params(map_name, params))
+            if on_map:
+                on_map(map_name, results[map_name])
+        return results
+
+    def save_maps(self, maps, base_name, output_dir="."):
+        """Writes generated maps as {base_name}_{Map}.png. Returns the written paths."""
+        paths = {}
+        for map_name, img in maps.items():
+            path = f"{output_dir}/{base_name}_{map_name}.png"
+            self._save(img, path, is_gray=map_name in GRAY_MAPS)
+            paths[map_name] = path
+        return paths
+
+    def build_resolution_ladder(self, maps, resolutions=RESOLUTION_LADDER):
+        """
+        Downsamples source-resolution maps to each size in `resolutions` (longest edge).
+        Levels are built from a shared pyramid, largest first, so each one is resized
+        from the previous level rather than from the source. Sizes above the source
+        resolution are skipped (no upscaling); see ladder_sizes. Returns {size: maps}.
+        """
+        if not maps:
+            return {}  # e.g. every map was folded into a constant
+        h, w = next(iter(maps.values())).shape[:2]
+        src_size = max(h, w)
+        sizes = self.ladder_sizes(src_size, resolutions)
+        
+        # Area averaging is correct for colour and masks. Normals are averaged as
+        # vectors (decoded to -1..1) and only renormalised when a level is emitted,
+        # so lower levels aren't biased by the renormalisation of higher ones.
+        current = {}
+        for map_name, img in maps.items():
+            current[map_name] = img * 2.0 - 1.0 if map_name == "Normal" else img
+        
+        current_dsize = (w, h)
+        ladder = {}
+        for size in sorted(set(resolutions) - set(sizes), reverse=True):
+            print(f"Skipping {size}px level (source is {src_size}px)")
+        for size in sizes:
+            scale = size / src_size
+            dsize = (max(1, round(w * scale)), max(1, round(h * scale)))
+            if dsize != current_dsize:
+                current = {name: cv2.resize(img, dsize, interpolation=cv2.INTER_AREA)
+                           for name, img in current.items()}
+                current_dsize = dsize
+            
+            level = {}
+            for map_name, img in current.items():
+                if map_name == "Normal":
+                    length = np.sqrt(np.sum(img * img, axis=2, keepdims=True))
+                    img = img / np.maximum(length, 1e-6) * 0.5 + 0.5
+                level[map_name] = np.clip(img, 0.0, 1.0)
+            ladder[size] = level
+        return ladder
+
+    def ladder_sizes(self, src_size, resolutions=RESOLUTION_LADDER):
+        """
+        Ladder levels written for a source whose longest edge is src_size, largest
+        first. If the source is smaller than every requested size, it is written at
+        its own resolution so the export is never empty.
+        """
+        sizes = sorted({size for size in resolutions if size <= src_size}, reverse=True)
+        return sizes or [src_size]
+
+    def save_resolution_ladder(self, maps, base_name, output_dir=".", resolutions=RESOLUTION_LADDER):
+        """Writes each ladder level to {output_dir}/{size}/{base_name}_{Map}.png. Returns {size: paths}."""
+        paths = {}
+        for size, level in self.build_resolution_ladder(maps, resolutions).items():
+            level_dir = os.path.join(output_dir, str(size))
+            os.makedirs(level_dir, exist_ok=True)
+            paths[size] = self.save_maps(level, base_name, level_dir)
+        return paths
+
+    def _source_signature(self, image_path):
+        st = os.stat(image_path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _is_fresh(self, target, source_sig, params_key):
+        """True if the files recorded for target were written from this source/params and are untouched."""
+        record = self._written.get(target)
+        if record is None or record["source"] != source_sig or record["params"] != params_key:
+            return False
+        for path, mtime in record["mtimes"].items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        for path, (map_name, info) in record["folded"].items():
+            if self._sidecar_entry(path, map_name) != info:
+                return False
+        return True
+
+    def _record_written(self, target, source_sig, params_key, paths, files=None, folded=None):
+        """
+        files: what freshness depends on (default: the written paths themselves).
+        folded: {sidecar path: (map name, info)} entries that must stay in their sidecars.
+        """
+        if files is None:
+            files = paths.values() if isinstance(paths, dict) else [paths]
+        self._written[target] = {
+            "source": source_sig,
+            "params": params_key,
+            "paths": paths,
+            "mtimes": {path: os.stat(path).st_mtime_ns for path in files},
+            "folded": folded or {},
+        }
+
+    def _dispatch_stamp(self):
+        try:
+            st = os.stat(default_table_path())
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _refresh_dispatch(self):
+        """Reloads the dispatch table if calibration.py rewrote or reset it since it was loaded. Returns True if reloaded."""
+        table, stamp = self._loaded_dispatch
+        if self.dispatch is not table:
+            return False  # Set explicitly (e.g. DispatchTable.fixed); leave it alone
+        current = self._dispatch_stamp()
+        if current == stamp:
+            return False
+        print("Dispatch table changed; reloading.")
+        self.dispatch = load_dispatch()
+        self._loaded_dispatch = (self.dispatch, current)
+        # Retained maps may come from other backends; patching them would no longer
+        # match a full run bit for bit
+        self._retained.clear()
+        return True
+
+    def _retained_entry(self, image_path, source_sig):
+        """
+        Intermediates kept for this source. If the file changed on disk they are
+        replaced, keeping the old ones as entry["previous"] for incremental patching.
+        """
+        entry = self._retained.get(image_path)
+        if entry is None or entry["source"] != source_sig:
+            previous = entry
+            if previous is not None:
+                previous.pop("previous", None)
+                if previous["raw"] is None or not self.incremental:
+                    previous = None
+            entry = {"source": source_sig, "raw": None, "gray": None, "maps": {}, "previous": previous}
+        if self.retain_limit > 0:
+            self._retained[image_path] = entry
+            self._retained.move_to_end(image_path)
+            while len(self._retained) > self.retain_limit:
+                self._retained.popitem(last=False)
+        return entry
+
+    def _dirty_blocks(self, old, new):
+        """Boolean grid with one cell per INCREMENTAL_BLOCK square, True where old and new differ."""
+        h, w = new.shape[:2]
+        block = INCREMENTAL_BLOCK
+        rows, cols = -(-h // block), -(-w // block)
+        diff = np.zeros((rows * block, cols * block), dtype=bool)
+        changed = old != new
+        diff[:h, :w] = changed.any(axis=2) if changed.ndim == 3 else changed
+        return diff.reshape(rows, block, cols, block).any(axis=(1, 3))
+
+    def _block_rects(self, blocks, grow, shape):
+        """Pixel rects (x0, y0, x1, y1) covering the True cells of blocks, each grown by `grow` cells."""
+        mask = blocks.astype(np.uint8)
+        if grow > 0:
+            mask = cv2.dilate(mask, np.ones((2 * grow + 1, 2 * grow + 1), np.uint8))
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        h, w = shape[:2]
+        block = INCREMENTAL_BLOCK
+        rects = []
+        for x, y, bw, bh, _ in stats[1:count]:
+            rects.append((x * block, y * block, min(w, (x + bw) * block), min(h, (y + bh) * block)))
+        return rects
+
+    def _patch_maps(self, entry, previous, missing, params, progress=None):
+        """
+        Brings the previous source's maps up to date with an edited source by
+        regenerating only the blocks that changed, grown by each map's map_halo().
+        Maps that depend on the whole image, had other parameters, or would need
+        most of the image recomputed are left for a full run.
+        Returns {map name: patched map}; fills entry["gray"] and entry["maps"].
+        """
+        raw = entry["raw"]
+        if previous["raw"].shape != raw.shape:
+            return {}
+        blocks = self._dirty_blocks(previous["raw"], raw)
+        if not blocks.any():
+            print("Source pixels unchanged; reusing previous maps.")
+        
+        candidates = {}
+        for map_name in missing:
+            kwargs = self.map_params(map_name, params)
+            params_key = tuple(sorted(kwargs.items()))
+            cached = previous["maps"].get(map_name)
+            halo = map_halo(map_name, kwargs)
+            if cached is None or cached[0] != params_key or halo is None:
+                continue
+            if MAP_GENERATORS[map_name][1] == "gray" and previous["gray"] is None:
+                continue
+            # Context is rounded up to whole blocks so every crop starts on the block
+            # grid: each pixel then takes the same SIMD/scalar path through OpenCV's
+            # filters as in a full run, and the patch is bit-identical.
+            grow = -(-halo // INCREMENTAL_BLOCK)
+            pad = grow * INCREMENTAL_BLOCK
+            rects = self._block_rects(blocks, grow, raw.shape)
+            area = sum((min(raw.shape[1], x1 + pad) - max(0, x0 - pad)) *
+                       (min(raw.shape[0], y1 + pad) - max(0, y0 - pad)) for x0, y0, x1, y1 in rects)
+            if area > raw.shape[0] * raw.shape[1] * INCREMENTAL_MAX_AREA:
+                continue
+            candidates[map_name] = (kwargs, params_key, pad, rects)
+        if not candidates:
+            return {}
+        
+        # Grayscale is per-pixel, so only the changed blocks need converting.
+        # Previous arrays are patched in place; the previous entry is discarded.
+        if any(MAP_GENERATORS[m][1] == "gray" for m in candidates):
+            gray = previous["gray"]
+            for x0, y0, x1, y1 in self._block_rects(blocks, 0, raw.shape):
+                gray[y0:y1, x0:x1] = self._to_grayscale(raw[y0:y1, x0:x1])
+            entry["gray"] = gray
+        
+        patched = {}
+        self._dispatch_shape = raw.shape[:2]
+        try:
+            for map_name, (kwargs, params_key, pad, rects) in candidates.items():
+                method, source, stage = MAP_GENERATORS[map_name]
+                self._stage(progress, f"{stage} ({len(rects)} edited regions)")
+                src = raw if source == "raw" else entry["gray"]
+                result = previous["maps"][map_name][1]
+                for x0, y0, x1, y1 in rects:
+                    # Generate the region plus its context, keep only the region itself
+                    cx0, cy0 = max(0, x0 - pad), max(0, y0 - pad)
+                    cx1, cy1 = min(src.shape[1], x1 + pad), min(src.shape[0], y1 + pad)
+                    region = getattr(self, method)(src[cy0:cy1, cx0:cx1], **kwargs)
+                    result[y0:y1, x0:x1] = region[y0 - cy0:y1 - cy0, x0 - cx0:x1 - cx0]
+                entry["maps"][map_name] = (params_key, result)
+                patched[map_name] = result
+        finally:
+            self._dispatch_shape = None
+        return patched
+
+    def process_pipeline(self, image_path, output_dir=".", progress=None, resolutions=None,
+                         maps=None, params=None, archive=None, fold=False, fold_tolerance=FOLD_TOLERANCE):
+        """
+        Runs the full suite.
+        progress(stage) is called at each stage boundary; raising from it cancels the run.
+        If `resolutions` is given, maps are generated once and written as a resolution
+        ladder (one sub-folder per size) instead of a single source-resolution set.
+        maps/params select a subset of maps and override their parameters (see generate_maps).
+        archive: a texture_pack.TexturePackWriter to store the maps in instead of
+        loose files (output_dir is then unused). Returns the pack's index entry.
+        fold: skip writing maps that are (near-)constant or identical to one already
+        written, and record a scalar value / shared file in {base_name}_Material.json
+        instead (see fold_maps). Toggling fold (or its tolerance) rewrites the maps.
+        
+        Only maps whose source or parameters changed since the last export to the same
+        place are regenerated and rewritten; the rest reuse retained intermediates
+        and the files already on disk. When a retained source is edited, only the
+        edited regions of its maps are regenerated (see _patch_maps).
+        """
+        self._refresh_dispatch()
+        image_key = os.path.abspath(image_path)
+        source_sig = self._source_signature(image_path)
         base_name = os.path.splitext(os.path.basename(image_path))[0]
+        ladder_key = tuple(sorted(set(resolutions))) if resolutions else None
+        
+        # Folding decides which files exist, so it is part of what the outputs were written with
+        fold_key = ("fold", fold_tolerance) if fold else ("no fold",)
+        
+        # 1. Work out which outputs are stale
+        paths = {}
+        stale = []
+        for map_name in maps or MAP_NAMES:
+            params_key = tuple(sorted(self.map_params(map_name, params).items()))
+            target = (os.path.abspath(output_dir), base_name, map_name, ladder_key)
+            if archive is None and self._is_fresh(target, source_sig, (params_key, fold_key)):
+                paths[map_name] = self._written[target]["paths"]
+            else:
+                stale.append((map_name, params_key, target))
+        
+        if not stale:
+            print("All maps up to date.")
+            return self._paths_by_level(paths, resolutions)
         
-        self._save(albedo, f"{output_dir}/{base_name}_Albedo.png")
-        self._save(normal, f"{output_dir}/{base_name}_Normal.png")
-        self._save(rough, f"{output_dir}/{base_name}_Roughness.png", is_gray=True)
-        self._save(ao, f"{output_dir}/{base_name}_AO.png", is_gray=True)
-        self._save(height, f"{output_dir}/{base_name}_Displacement.png", is_gray=True)
-        print("Done.")
+        # 2. Regenerate only stale maps, reusing retained intermediates
+        entry = self._retained_entry(image_key, source_sig)
+        generated = {}
+        missing = []
+        for map_name, params_key, _ in stale:
+            cached = entry["maps"].get(map_name)
+            if cached is not None and cached[0] == params_key:
+                generated[map_name] = cached[1]
+            else:
+                missing.append(map_name)
+        
+        if missing:
+            if entry["raw"] is None:
+                self._stage(progress, f"Loading {image_path}...")
+                entry["raw"] = self._load_image_as_float(image_path)
+            previous = entry.pop("previous", None)
+            if previous is not None:
+                patched = self._patch_maps(entry, previous, missing, params, progress)
+                generated.update(patched)
+                missing = [map_name for map_name in missing if map_name not in patched]
+            if entry["gray"] is None and any(MAP_GENERATORS[m][1] == "gray" for m in missing):
+                entry["gray"] = self._to_grayscale(entry["raw"])
+        
+        if missing:
+            # Retain each map as soon as it exists, so a run cancelled part-way (e.g.
+            # superseded by a slider change) still leaves its finished maps for reuse
+            def retain(map_name, result):
+                params_key = tuple(sorted(self.map_params(map_name, params).items()))
+                entry["maps"][map_name] = (params_key, result)
+            
+            generated.update(self.generate_maps(entry["raw"], progress, missing, params,
+                                                gray=entry["gray"], on_map=retain))
+        
+        # 3. Save only what changed
+        self._stage(progress, "Saving maps...")
+        folded = {}
+        src_size = max(next(iter(generated.values())).shape[:2])
+        if fold:
+            folded = self.fold_maps(generated, base_name, output_dir, fold_tolerance,
+                                    dedupe=archive is None and not resolutions)
+            generated = {name: img for name, img in generated.items() if name not in folded}
+        if archive is not None:
+            return self._save_to_archive(archive, base_name, image_key, generated, params, resolutions, folded)
+        if resolutions:
+            written = self.save_resolution_ladder(generated, base_name, output_dir, resolutions)
+        else:
+            written = self.save_maps(generated, base_name, output_dir)
+        # Also run without fold: maps written as files must leave an earlier sidecar
+        sidecar_paths = self._update_material_sidecar(base_name, output_dir, folded, generated, resolutions, src_size)
+        for map_name, params_key, target in stale:
+            if map_name in folded:
+                # No file of its own: the sidecar entry carries its value/reference, so
+                # the record goes stale when that entry (or the shared file) changes
+                files = [folded[map_name]["shared"]] if "shared" in folded[map_name] else []
+                sidecars = sidecar_paths.values() if resolutions else [sidecar_paths]
+                self._record_written(target, source_sig, (params_key, fold_key), sidecar_paths, files,
+                                     folded={path: (map_name, folded[map_name]) for path in sidecars})
+                paths[map_name] = sidecar_paths
+                continue
+            if resolutions:
+                map_paths = {size: level[map_name] for size, level in written.items()}
+            else:
+                map_paths = written[map_name]
+            self._record_written(target, source_sig, (params_key, fold_key), map_paths)
+            paths[map_name] = map_paths
+        
+        print(f"Done. Regenerated {len(stale)} of {len(paths)} maps.")
+        paths = {map_name: paths[map_name] for map_name in maps or MAP_NAMES}
+        return self._paths_by_level(paths, resolutions)
+
+    def _save_to_archive(self, archive, base_name, source, maps, params, resolutions, folded=None):
+        map_params = {map_name: self.map_params(map_name, params) for map_name in list(maps) + list(folded or {})}
+        name = archive.material_name(base_name, source)
+        if name != base_name:
+            print(f"{base_name} is already packed from another source; storing {source} as {name}")
+            base_name = name
+        entry = archive.add_material(base_name, {}, map_params, source, folded=folded)
+        if resolutions:
+            for size, level in self.build_resolution_ladder(maps, resolutions).items():
+                entry = archive.add_material(base_name, level, level=size)
+        else:
+            entry = archive.add_material(base_name, maps)
+        print(f"Done. Packed {len(maps)} maps into {archive.path}")
+        return entry
+
+    def fold_maps(self, maps, base_name, output_dir=".", tolerance=FOLD_TOLERANCE, dedupe=True):
+        """
+        Finds maps that don't need a texture of their own:
+          {"constant": value}  every channel stays within `tolerance` of a constant
+                               (value is a float, or [r, g, b] for colour maps)
+          {"shared": path,     pixels identical to a file already written this session;
+           "sha1": digest}     digest of its uint8 pixels, so readers can check the file
+                               still holds them
+        Returns {map name: fold info}. Maps that will be written are registered so
+        later materials can share them.
+        """
+        folded = {}
+        for map_name, img in maps.items():
+            channels = img.reshape(-1, img.shape[2]) if img.ndim == 3 else img.reshape(-1, 1)
+            spread = channels.max(axis=0) - channels.min(axis=0)
+            if np.all(spread <= tolerance):
+                value = [round(float(v), 4) for v in channels.mean(axis=0)]
+                folded[map_name] = {"constant": value if len(value) > 1 else value[0]}
+                continue
+            if not dedupe:
+                continue
+            
+            img_uint8 = (img * 255).astype(np.uint8)
+            digest = hashlib.sha1(img_uint8.tobytes()).hexdigest()
+            key = (map_name, img_uint8.shape, digest)
+            own_path = os.path.abspath(f"{output_dir}/{base_name}_{map_name}.png")
+            existing = self._content_index.get(key)
+            # The file may have been re-exported with other parameters since it was indexed
+            if existing and existing != own_path and self._file_has_pixels(existing, img_uint8):
+                folded[map_name] = {"shared": existing, "sha1": digest}
+            else:
+                self._content_index[key] = own_path
+        
+        for map_name, info in folded.items():
+            kind = "constant" if "constant" in info else "shared"
+            print(f"Folded {map_name} ({kind}: {info[kind]})")
+        return folded
+
+    def _file_has_pixels(self, path, img_uint8):
+        try:
+            with Image.open(path) as f:
+                return np.array_equal(np.asarray(f), img_uint8)
+        except OSError:
+            return False
+
+    def _update_material_sidecar(self, base_name, output_dir, folded, written_maps, resolutions=None, src_size=None):
+        """
+        Keeps {base_name}_Material.json in sync: folded maps are added, maps that were
+        written as files again are removed. Stale files of newly folded maps are deleted.
+        Ladder exports get a sidecar in each level folder written, next to the maps it
+        describes. The file is only rewritten when its content changes.
+        Returns the sidecar path, or {size: path} for ladders.
+        """
+        if resolutions:
+            sidecar_dirs = {size: os.path.join(output_dir, str(size)) for size in self.ladder_sizes(src_size, resolutions)}
+            level_dirs = [os.path.join(output_dir, str(size)) for size in sorted(set(resolutions) | set(sidecar_dirs))]
+        else:
+            sidecar_dirs = {None: output_dir}
+            level_dirs = [output_dir]
+        
+        # A folded map must not leave its old texture behind for the importer to pick up
+        for map_name in folded:
+            for level_dir in level_dirs:
+                stale_file = os.path.join(level_dir, f"{base_name}_{map_name}.png")
+                if os.path.exists(stale_file):
+                    os.remove(stale_file)
+        
+        paths = {}
+        for size, sidecar_dir in sidecar_dirs.items():
+            path = f"{sidecar_dir}/{base_name}_Material.json"
+            paths[size] = path
+            try:
+                with open(path) as f:
+                    old_text = f.read()
+                sidecar = json.loads(old_text)
+            except (OSError, ValueError):
+                old_text, sidecar = None, {}
+            sidecar_maps = sidecar.setdefault("folded", {})
+            for map_name in written_maps:
+                sidecar_maps.pop(map_name, None)
+            sidecar_maps.update(folded)
+            
+            if sidecar_maps:
+                # Unchanged content keeps its mtime, so dependent records stay fresh
+                text = json.dumps(sidecar, indent=2)
+                if text != old_text:
+                    os.makedirs(sidecar_dir, exist_ok=True)
+                    with open(path, "w") as f:
+                        f.write(text)
+            elif old_text is not None:
+                os.remove(path)
+        return paths if resolutions else paths[None]
+
+    def _sidecar_entry(self, path, map_name):
+        """The folded info recorded for map_name in a sidecar, or None."""
+        try:
+            with open(path) as f:
+                return json.load(f).get("folded", {}).get(map_name)
+        except (OSError, ValueError):
+            return None
+
+    def _paths_by_level(self, paths, resolutions):
+        """{map: path} as-is, or {map: {size: path}} regrouped to {size: {map: path}} for ladders."""
+        if not resolutions:
+            return paths
+        by_level = {}
+        for map_name, map_paths in paths.items():
+            for size, path in map_paths.items():
+                by_level.setdefault(size, {})[map_name] = path
+        return by_level
 
     def _save(self, img_float, path, is_gray=False):
         img_uint8 = (img_float * 255).astype(np.uint8)
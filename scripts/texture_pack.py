@@ -0,0 +1,237 @@
+import os
+import io
+import json
+import mmap
+import struct
+import zipfile
+
+# ------------------------------------------------------------------------------
+# TEXTURE PACK ARCHIVES
+# ------------------------------------------------------------------------------
+# One file per batch instead of five loose PNGs per material. A pack is a plain
+# ZIP with every member STORED (uncompressed at the ZIP level), so:
+#   - any member can be located through the central directory (random access
+#     by material name) and read straight out of an mmap of the file
+#   - "raw" members are bare uint8 pixels that can be viewed without decoding
+#   - standard tools can still list and extract it
+#
+# Layout:
+#   index.json                       materials, their parameters and members
+#   <material>/<Map>.png             encoded maps (default; importable as-is)
+#   <material>/<Map>.raw             or raw uint8 pixels (shape in the index)
+#   <material>/<size>/<Map>.png      resolution ladder levels, if exported
+#
+# Near-constant maps can be folded into the index ("folded") instead of members.
+#
+# Only the stdlib is needed to read PNG members (e.g. inside Unreal); numpy is
+# imported lazily for array access.
+
+INDEX_NAME = "index.json"
+PACK_EXTENSION = ".tpack"
+FORMAT_VERSION = 1
+
+# Local file header: signature, versions, flags, method, time, date, crc, sizes, name/extra lengths
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+
+class TexturePackWriter:
+    """Appends material map sets to a pack. Call close() (or use `with`) to write the index."""
+
+    def __init__(self, path, raw=False):
+        self.path = path
+        self.raw = raw
+        self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True)
+        self._materials = {}
+        self._members = set()
+
+    def material_name(self, name, source):
+        """
+        Key to store a material from `source` under: `name`, or `name_2`, `name_3`...
+        if a material from another source (e.g. the same file name in another
+        folder) already uses it.
+        """
+        candidate, n = name, 1
+        while self._materials.get(candidate, {}).get("source") not in (None, source):
+            n += 1
+            candidate = f"{name}_{n}"
+        return candidate
+
+    def add_material(self, name, maps, params=None, source=None, level=None, folded=None):
+        """
+        Adds one material's maps ({map name: float 0-1 image}).
+        level: ladder size the maps belong to, or None for source resolution.
+        folded: maps stored as a scalar instead of pixels (see TextureEngine.fold_maps).
+        Raises ValueError if `name` belongs to another source or a map is added twice;
+        use material_name() to pick a free name.
+        """
+        import numpy as np
+        from PIL import Image
+
+        entry = self._materials.setdefault(name, {"source": source, "params": {}, "maps": {}, "folded": {}})
+        if source:
+            if entry["source"] not in (None, source):
+                raise ValueError(f"Material '{name}' is already in {self.path} from {entry['source']}")
+            entry["source"] = source
+        if params:
+            entry["params"].update(params)
+        if folded:
+            entry["folded"].update(folded)
+        prefix = f"{name}/{level}/" if level else f"{name}/"
+        for map_name, img in maps.items():
+            member = f"{prefix}{map_name}.raw" if self.raw else f"{prefix}{map_name}.png"
+            if member in self._members:
+                raise ValueError(f"{member} is already in {self.path}")
+            self._members.add(member)
+            img_uint8 = (img * 255).astype(np.uint8)
+            if self.raw:
+                self._zip.writestr(member, np.ascontiguousarray(img_uint8).tobytes())
+            else:
+                buf = io.BytesIO()
+                Image.fromarray(img_uint8).save(buf, format="PNG")
+                self._zip.writestr(member, buf.getvalue())
+            key = f"{level}/{map_name}" if level else map_name
+            entry["maps"][key] = {
+                "member": member,
+                "format": "raw" if self.raw else "png",
+                "shape": list(img_uint8.shape),
+            }
+        return entry
+
+    def close(self):
+        if self._zip is None:
+            return
+        index = {"version": FORMAT_VERSION, "materials": self._materials}
+        self._zip.writestr(INDEX_NAME, json.dumps(index, indent=2))
+        self._zip.close()
+        self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TexturePack:
+    """Read access to a pack: index lookups and zero-copy member views over an mmap."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._zip = zipfile.ZipFile(self._file)
+        self.index = json.loads(self._zip.read(INDEX_NAME))
+        self._offsets = {}
+
+    def materials(self):
+        return sorted(self.index["materials"])
+
+    def material(self, name):
+        """Index entry for a material: {"source", "params", "maps": {map: member info}}."""
+        return self.index["materials"][name]
+
+    def maps(self, name):
+        return list(self.material(name)["maps"])
+
+    def _data_offset(self, member):
+        offset = self._offsets.get(member)
+        if offset is None:
+            info = self._zip.getinfo(member)
+            header = _LOCAL_HEADER.unpack_from(self._mmap, info.header_offset)
+            name_len, extra_len = header[-2], header[-1]
+            offset = self._offsets[member] = info.header_offset + _LOCAL_HEADER.size + name_len + extra_len
+        return offset
+
+    def member_view(self, name, map_name):
+        """memoryview of a member's stored bytes, straight from the mmap (no copy)."""
+        member = self.material(name)["maps"][map_name]["member"]
+        offset = self._data_offset(member)
+        return memoryview(self._mmap)[offset:offset + self._zip.getinfo(member).file_size]
+
+    def read_array(self, name, map_name):
+        """uint8 image for a map. Raw members are returned as a read-only view of the mmap."""
+        import numpy as np
+
+        info = self.material(name)["maps"][map_name]
+        data = self.member_view(name, map_name)
+        if info["format"] == "raw":
+            return np.frombuffer(data, dtype=np.uint8).reshape(info["shape"])
+        import cv2
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB) if img.ndim == 3 else img
+
+    def extract(self, name, map_name, directory, filename=None):
+        """
+        Writes one map as a PNG (for tools that need a file), by default named
+        {name}_{Map}.png ({name}_{size}_{Map}.png for ladder levels). Returns the path.
+        """
+        info = self.material(name)["maps"][map_name]
+        path = os.path.join(directory, filename or f"{name}_{map_name.replace('/', '_')}.png")
+        if info["format"] == "png":
+            with open(path, "wb") as f:
+                f.write(self.member_view(name, map_name))
+        else:
+            from PIL import Image
+            Image.fromarray(self.read_array(name, map_name)).save(path)
+        return path
+
+    def close(self):
+        self._zip.close()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # Views from member_view/read_array are still alive; the GC closes it
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Build and inspect TextureGen Pro texture packs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="Generate maps for images into one pack")
+    p_build.add_argument("pack")
+    p_build.add_argument("images", nargs="+")
+    p_build.add_argument("--raw", action="store_true", help="Store raw uint8 pixels instead of PNG")
+    p_build.add_argument("--ladder", action="store_true", help="Store the 4K/2K/1K/512 resolution ladder")
+    p_build.add_argument("--fold", action="store_true", help="Store uniform maps as constants in the index")
+
+    p_list = sub.add_parser("list", help="List materials and maps")
+    p_list.add_argument("pack")
+
+    p_extract = sub.add_parser("extract", help="Extract one material's maps as PNGs")
+    p_extract.add_argument("pack")
+    p_extract.add_argument("material")
+    p_extract.add_argument("--output", default=".")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        from texture_engine import TextureEngine, RESOLUTION_LADDER
+        engine = TextureEngine()
+        engine.retain_limit = 0  # Each image is processed once
+        resolutions = RESOLUTION_LADDER if args.ladder else None
+        with TexturePackWriter(args.pack, raw=args.raw) as pack:
+            for image in args.images:
+                engine.process_pipeline(image, resolutions=resolutions, archive=pack, fold=args.fold)
+        print(f"Wrote {args.pack}")
+    elif args.command == "list":
+        with TexturePack(args.pack) as pack:
+            for name in pack.materials():
+                print(f"{name}: {', '.join(pack.maps(name))}")
+    elif args.command == "extract":
+        os.makedirs(args.output, exist_ok=True)
+        with TexturePack(args.pack) as pack:
+            for map_name in pack.maps(args.material):
+                print(pack.extract(args.material, map_name, args.output))
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
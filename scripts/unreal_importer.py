@@ -1,30 +1,44 @@
 import unreal
 import os
 import sys
+import json
+import shutil
+import tempfile
+
+# AssetBatch lives in UnrealPlugin/ (copy it next to this script in Content/Python).
+# When run from a repository checkout, find it there.
+if "__file__" in globals():
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "UnrealPlugin"))
+from unreal_asset_ops import AssetBatch
 
 # ------------------------------------------------------------------------------
 # CONFIGURATION
 # ------------------------------------------------------------------------------
 # Path where the app exports textures
 # CHANGE THIS to your actual export folder from the Windows App
+# (for a ladder export, the sub-folder of the size to import, e.g. ".../1024")
 IMPORT_DIR = "C:/Users/User/Documents/TextureGen_Exports" 
 
+# Optional: read from a texture pack (.tpack, see texture_pack.py) instead of
+# IMPORT_DIR. Copy texture_pack.py next to this script in Content/Python.
+ARCHIVE_PATH = None
+# Ladder level to import from the pack (e.g. 1024), or None for source resolution
+ARCHIVE_LEVEL = None
+
 # Unreal Path
 DESTINATION_PATH = "/Game/AI_Generated_Materials"
 
 # Master Material Path
 # You MUST have a material at this path in Unreal Project.
 # It needs Texture Parameters named: 'BaseColor', 'Normal', 'Roughness', 'Metallic', 'AO', 'Displacement'
+# Maps folded to a constant by the generator (see TextureEngine.fold_maps) are set
+# through Scalar Parameters named '<Param>Value' (Vector for 'BaseColorValue'/'NormalValue').
 MASTER_MATERIAL_PATH = "/Game/Materials/M_Master_Standard"
 
 # ------------------------------------------------------------------------------
 # UTILS
 # ------------------------------------------------------------------------------
 
-def create_directory(path):
-    if not unreal.EditorAssetLibrary.does_directory_exist(path):
-        unreal.EditorAssetLibrary.make_directory(path)
-
 def get_texture_setting(name):
     """
     Returns (CompressionSettings, sRGB, ParameterName) based on filename.
@@ -51,60 +65,96 @@ def get_texture_setting(name):
         
     return (unreal.TextureCompressionSettings.TC_DEFAULT, True, None)
 
-def import_texture(file_path, dest_path):
+def import_texture(file_path, dest_path, batch):
+    """
+    Queues a texture import on the batch. Compression/sRGB are applied once the
+    batch's imports are flushed. Returns (asset_path, param_name).
+    """
     name = os.path.splitext(os.path.basename(file_path))[0]
-    task = unreal.AssetImportTask()
-    task.filename = file_path
-    task.destination_path = dest_path
-    task.destination_name = name
-    task.replace_existing = True
-    task.automated = True
-    task.save = True
-
-    factory = unreal.TextureFactory()
-    task.factory = factory
-    
-    asset_tools = unreal.AssetToolsHelpers.get_asset_tools()
-    asset_tools.import_asset_tasks([task])
-    
-    # Post-Import Setup (Compression/sRGB)
-    asset_path = f"{dest_path}/{name}"
-    texture = unreal.EditorAssetLibrary.load_asset(asset_path)
+    compression, srgb, param_name = get_texture_setting(name)
     
-    if texture:
-        compression, srgb, param_name = get_texture_setting(name)
-        
+    def setup(texture):
+        # Post-Import Setup (Compression/sRGB)
         texture.compression_settings = compression
         texture.srgb = srgb
         texture.post_edit_change() # Apply changes
-        unreal.EditorAssetLibrary.save_asset(asset_path)
-        
-        return texture, param_name
     
-    return None, None
+    asset_path = batch.queue_import(file_path, dest_path, name, factory=unreal.TextureFactory(), on_imported=setup)
+    return asset_path, param_name
+
+def texture_asset_path(file_path):
+    """Where import_texture puts a generated file, e.g. ".../Wood_AO.png" -> "<DEST>/Wood/Wood_AO"."""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return f"{DESTINATION_PATH}/{stem.rsplit('_', 1)[0]}/{stem}"
+
+def shared_file_matches(path, digest):
+    """True if a shared map's file still holds the pixels it was folded against."""
+    if not digest:
+        return os.path.exists(path)
+    import hashlib
+    import numpy as np
+    from PIL import Image
+    try:
+        with Image.open(path) as img:
+            return hashlib.sha1(np.asarray(img).tobytes()).hexdigest() == digest
+    except OSError:
+        return False
 
-def create_material_instance(name, folder, textures):
-    # Check for Master Material
-    master_mat = unreal.EditorAssetLibrary.load_asset(MASTER_MATERIAL_PATH)
+def apply_folded_maps(mic_asset, folded, textures, imported, batch, master_params=None):
+    """Binds folded maps: constants as scalar/vector parameters, shared maps as an existing texture."""
+    count = 0
+    for map_name, info in folded.items():
+        param_name = get_texture_setting(map_name)[2]
+        if not param_name:
+            continue
+        if "constant" in info and master_params is not None and f"{param_name}Value" not in master_params:
+            unreal.log_warning(f"⚠️ Master Material has no '{param_name}Value' parameter; {map_name} constant "
+                               f"{info['constant']} not bound. Add it, or re-export without folding.")
+            continue
+        if "constant" in info:
+            value = info["constant"]
+            if isinstance(value, list):
+                unreal.MaterialEditingLibrary.set_material_instance_vector_parameter_value(
+                    mic_asset, f"{param_name}Value", unreal.LinearColor(value[0], value[1], value[2], 1.0)
+                )
+            else:
+                unreal.MaterialEditingLibrary.set_material_instance_scalar_parameter_value(
+                    mic_asset, f"{param_name}Value", value
+                )
+            count += 1
+        elif "shared" in info:
+            if not shared_file_matches(info["shared"], info.get("sha1")):
+                unreal.log_warning(f"⚠️ {info['shared']} changed since {map_name} was folded onto it; "
+                                   f"re-export this material.")
+                continue
+            asset_path = texture_asset_path(info["shared"])
+            tex_asset = imported.get(asset_path) or batch.load(asset_path)
+            if tex_asset:
+                textures.append((tex_asset, param_name))
+            else:
+                unreal.log_warning(f"Shared texture {asset_path} for {map_name} not found")
+    return count
+
+def create_material_instance(name, folder, textures, batch, folded=None, imported=None):
+    # Check for Master Material (loaded once per run)
+    master_mat = batch.load(MASTER_MATERIAL_PATH)
     if not master_mat:
         unreal.log_error(f"❌ ERROR: Master Material not found at {MASTER_MATERIAL_PATH}")
         unreal.log_error("Please create a Material in Unreal at that path with Texture Parameters.")
         return
 
-    asset_tools = unreal.AssetToolsHelpers.get_asset_tools()
     mic_name = f"MI_{name}"
-    mic_path = f"{folder}/{mic_name}"
     
-    # Check if exists
-    if unreal.EditorAssetLibrary.does_asset_exist(mic_path):
-        mic_asset = unreal.EditorAssetLibrary.load_asset(mic_path)
-    else:
-        # Create MIC
-        mic_factory = unreal.MaterialInstanceConstantFactoryNew()
-        mic_asset = asset_tools.create_asset(mic_name, folder, unreal.MaterialInstanceConstant, mic_factory)
+    # Reuses the instance if it already exists
+    mic_asset = batch.create(mic_name, folder, unreal.MaterialInstanceConstant, unreal.MaterialInstanceConstantFactoryNew())
     
     unreal.MaterialEditingLibrary.set_material_instance_parent(mic_asset, master_mat)
     
+    # Folded maps (no texture of their own)
+    textures = list(textures)
+    folded_count = apply_folded_maps(mic_asset, folded or {}, textures, imported or {}, batch,
+                                     batch.parameter_names(master_mat) if folded else None)
+    
     # Connect Textures
     connected_count = 0
     for tex_asset, param_name in textures:
@@ -114,23 +164,18 @@ def create_material_instance(name, folder, textures):
             )
             connected_count += 1
             
-    unreal.EditorAssetLibrary.save_asset(mic_asset.get_path_name())
-    unreal.log(f"✅ SUCCESS: Created Material Instance '{mic_name}' with {connected_count} textures.")
+    unreal.log(f"✅ SUCCESS: Created Material Instance '{mic_name}' with {connected_count} textures and {folded_count} constants.")
 
 # ------------------------------------------------------------------------------
 # MAIN
 # ------------------------------------------------------------------------------
 
-def run_pipeline():
-    if not os.path.exists(IMPORT_DIR):
-        unreal.log_warning(f"Import directory {IMPORT_DIR} does not exist. Please edit the script configuration.")
-        return
-
+def collect_groups_from_dir(import_dir):
     # Group files by 'Material Name' 
     # Logic: "MyTexture_Albedo.png" -> Group "MyTexture"
     groups = {}
     
-    for fname in os.listdir(IMPORT_DIR):
+    for fname in os.listdir(import_dir):
         if fname.lower().endswith(('.png', '.jpg', '.tga', '.exr')):
             # Split by last underscore to find base name
             # e.g. "Wood_Table_Albedo.png" -> "Wood_Table"
@@ -138,24 +183,105 @@ def run_pipeline():
                 base_name = fname.rsplit('_', 1)[0]
                 if base_name not in groups:
                     groups[base_name] = []
-                groups[base_name].append(os.path.join(IMPORT_DIR, fname))
+                groups[base_name].append(os.path.join(import_dir, fname))
+    return groups
+
+def collect_folded_from_dir(import_dir):
+    """Folded maps per material, from the generator's "<Material>_Material.json" sidecars."""
+    folded = {}
+    for fname in os.listdir(import_dir):
+        if fname.endswith("_Material.json"):
+            with open(os.path.join(import_dir, fname)) as f:
+                folded[fname[:-len("_Material.json")]] = json.load(f).get("folded", {})
+    return folded
+
+def collect_groups_from_pack(pack, staging_dir, level=None):
+    """
+    Materials come straight from the pack's index (no listing or name splitting).
+    Unreal imports from files, so each member is written to staging_dir first.
+    """
+    groups = {}
+    prefix = f"{level}/" if level else ""
+    for mat_name in pack.materials():
+        files = []
+        for map_name in pack.maps(mat_name):
+            if level and not map_name.startswith(prefix):
+                continue
+            if not level and "/" in map_name:
+                continue
+            # Named "{material}_{Map}.png" so import_texture picks the right settings
+            files.append(pack.extract(mat_name, map_name, staging_dir, f"{mat_name}_{map_name[len(prefix):]}.png"))
+        if files:
+            groups[mat_name] = files
+        elif pack.maps(mat_name):
+            # e.g. a --ladder pack has no source-resolution members
+            levels = sorted({m.split("/")[0] for m in pack.maps(mat_name) if "/" in m}, key=int)
+            available = (["None"] if any("/" not in m for m in pack.maps(mat_name)) else []) + levels
+            unreal.log_warning(f"{mat_name}: no maps at ARCHIVE_LEVEL = {level}; "
+                               f"the pack has {', '.join(available)}. Skipping its textures.")
+    return groups
+
+def collect_folded_from_pack(pack):
+    return {name: pack.material(name).get("folded", {}) for name in pack.materials()}
 
-    create_directory(DESTINATION_PATH)
+def run_pipeline():
+    staging_dir = None
+    if ARCHIVE_PATH:
+        if not os.path.exists(ARCHIVE_PATH):
+            unreal.log_warning(f"Texture pack {ARCHIVE_PATH} does not exist. Please edit the script configuration.")
+            return
+        # Only needed for packs, so loose-file imports work without texture_pack.py
+        from texture_pack import TexturePack
+        staging_dir = tempfile.mkdtemp(prefix="texturegen_")
+        with TexturePack(ARCHIVE_PATH) as pack:
+            groups = collect_groups_from_pack(pack, staging_dir, ARCHIVE_LEVEL)
+            folded = collect_folded_from_pack(pack)
+    else:
+        if not os.path.exists(IMPORT_DIR):
+            unreal.log_warning(f"Import directory {IMPORT_DIR} does not exist. Please edit the script configuration.")
+            return
+        groups = collect_groups_from_dir(IMPORT_DIR)
+        folded = collect_folded_from_dir(IMPORT_DIR)
+        levels = sorted((d for d in os.listdir(IMPORT_DIR) if d.isdigit() and os.path.isdir(os.path.join(IMPORT_DIR, d))), key=int)
+        if levels and not groups and not folded:
+            # A ladder export keeps each size (and its sidecars) in its own sub-folder
+            unreal.log_warning(f"{IMPORT_DIR} holds ladder levels ({', '.join(levels)}); "
+                               f"set IMPORT_DIR to one of them, e.g. {IMPORT_DIR}/{levels[-1]}.")
+            return
 
-    for mat_name, files in groups.items():
-        unreal.log(f"Processing Material Group: {mat_name} ({len(files)} files)")
+    try:
+        import_groups(groups, folded)
+    finally:
+        if staging_dir:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+def import_groups(groups, folded=None):
+    folded = folded or {}
+    # Materials whose maps were all folded have no files but still need an instance
+    for mat_name in folded:
+        groups.setdefault(mat_name, [])
+    
+    with AssetBatch() as batch:
+        batch.ensure_directory(DESTINATION_PATH)
         
-        imported_textures = []
-        mat_folder = f"{DESTINATION_PATH}/{mat_name}"
-        create_directory(mat_folder)
+        # 1. Queue every texture of every group, then import them in one go
+        queued = {}
+        for mat_name, files in groups.items():
+            unreal.log(f"Processing Material Group: {mat_name} ({len(files)} files)")
+            
+            mat_folder = f"{DESTINATION_PATH}/{mat_name}"
+            batch.ensure_directory(mat_folder)
+            queued[mat_name] = [import_texture(f, mat_folder, batch) for f in files]
         
-        for f in files:
-            tex, param = import_texture(f, mat_folder)
-            if tex:
-                imported_textures.append((tex, param))
+        imported = batch.flush_imports()
         
-        if imported_textures:
-            create_material_instance(mat_name, mat_folder, imported_textures)
+        # 2. Build Material Instances (saved together when the batch closes)
+        for mat_name, entries in queued.items():
+            imported_textures = [(imported[path], param) for path, param in entries if path in imported]
+            mat_folded = folded.get(mat_name, {})
+            if imported_textures or mat_folded:
+                create_material_instance(mat_name, f"{DESTINATION_PATH}/{mat_name}", imported_textures, batch,
+                                         mat_folded, imported)
 
 if __name__ == "__main__":
     run_pipeline()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The scripts are run from scripts/ (and the Unreal modules from Content/Python),
+# so put both folders on the import path the same way.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+sys.path.insert(0, os.path.join(ROOT, "UnrealPlugin"))
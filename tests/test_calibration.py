@@ -0,0 +1,56 @@
+import json
+import pytest
+import calibration
+from calibration import load_dispatch, save_dispatch, DispatchTable
+
+
+def test_override_accepts_known_names(monkeypatch):
+    monkeypatch.setenv("TEXTUREGEN_BACKEND", "gaussian_blur=filter2d")
+    table = load_dispatch("/nonexistent/dispatch.json")
+    assert table.backend("gaussian_blur", (512, 512), 31) == "filter2d"
+    assert table.backend("normal_gradients", (512, 512)) == "separable"
+
+
+@pytest.mark.parametrize("value", ["bogus", "gaussian_blur=bogus", "blur=filter2d"])
+def test_override_rejects_unknown_names(monkeypatch, value):
+    monkeypatch.setenv("TEXTUREGEN_BACKEND", value)
+    with pytest.raises(ValueError):
+        load_dispatch("/nonexistent/dispatch.json")
+
+
+def test_table_from_other_library_versions_is_ignored(monkeypatch, tmp_path):
+    monkeypatch.delenv("TEXTUREGEN_BACKEND", raising=False)
+    path = str(tmp_path / "dispatch.json")
+    entries = {"gaussian_blur": {"512|32": {"backend": "filter2d", "timings": {}}}}
+    save_dispatch(DispatchTable(entries, calibration._host_info()), path)
+    assert load_dispatch(path).backend("gaussian_blur", (512, 512), 31) == "filter2d"
+    
+    with open(path) as f:
+        data = json.load(f)
+    data["host"]["opencv"] = "0.0.0"
+    with open(path, "w") as f:
+        json.dump(data, f)
+    assert load_dispatch(path).backend("gaussian_blur", (512, 512), 31) == "separable"
+
+
+def test_engine_picks_up_recalibration(monkeypatch, tmp_path):
+    import os
+    import cv2
+    import numpy as np
+    from texture_engine import TextureEngine
+    monkeypatch.delenv("TEXTUREGEN_BACKEND", raising=False)
+    path = str(tmp_path / "dispatch.json")
+    monkeypatch.setenv("TEXTUREGEN_DISPATCH_FILE", path)
+    source = str(tmp_path / "src.png")
+    cv2.imwrite(source, np.zeros((16, 16, 3), np.uint8))
+    
+    engine = TextureEngine()
+    assert engine.dispatch.backend("gaussian_blur", (512, 512), 31) == "separable"
+    entries = {"gaussian_blur": {"512|32": {"backend": "filter2d", "timings": {}}}}
+    save_dispatch(DispatchTable(entries, calibration._host_info()), path)
+    engine.process_pipeline(source, str(tmp_path), maps=["AO"])
+    assert engine.dispatch.backend("gaussian_blur", (512, 512), 31) == "filter2d"
+    
+    os.remove(path)  # calibration.py reset
+    engine.process_pipeline(source, str(tmp_path), maps=["AO"])
+    assert engine.dispatch.backend("gaussian_blur", (512, 512), 31) == "separable"
@@ -0,0 +1,85 @@
+import threading
+import pytest
+from export_queue import ExportQueue
+
+
+class _GatedEngine:
+    """Stands in for TextureEngine: each run stops at a gate between its two stages."""
+
+    def __init__(self):
+        self.runs = []
+        self.at_gate = threading.Event()
+        self.gate = threading.Event()
+
+    def process_pipeline(self, image_path, output_dir, progress=None, resolutions=None, params=None, fold=False):
+        self.runs.append((image_path, params))
+        progress("Loading...")
+        self.at_gate.set()
+        self.gate.wait(5)
+        progress("Saving maps...")
+        return {}
+
+
+@pytest.fixture
+def queue():
+    engine = _GatedEngine()
+    events = []
+    finished = threading.Condition()
+
+    def notify(job, event, detail):
+        with finished:
+            events.append((job.image_path, event))
+            finished.notify_all()
+
+    queue = ExportQueue(engine, notify)
+    queue.engine_stub, queue.events = engine, events
+
+    def wait_for(count):
+        with finished:
+            assert finished.wait_for(lambda: sum(e in ("done", "cancelled", "failed") for _, e in events) >= count, 5)
+    queue.wait_for = wait_for
+    yield queue
+    engine.gate.set()
+    queue.close()
+
+
+def _release(queue):
+    queue.engine_stub.gate.set()
+
+
+def test_repeat_requests_coalesce(queue):
+    running = queue.submit("a.png", "out")
+    assert queue.engine_stub.at_gate.wait(5)
+    assert queue.submit("a.png", "out") is running  # Same job, same params
+    queued = queue.submit("b.png", "out", params={"AO": {"radius": 10}})
+    assert queue.submit("b.png", "out", params={"AO": {"radius": 12}}) is queued
+    assert queued.params == {"AO": {"radius": 12}}  # Queued job takes the newest params
+    _release(queue)
+    queue.wait_for(2)
+    assert queue.engine_stub.runs == [("a.png", {}), ("b.png", {"AO": {"radius": 12}})]
+
+
+def test_new_params_supersede_the_running_job(queue):
+    first = queue.submit("a.png", "out", params={"AO": {"radius": 10}})
+    assert queue.engine_stub.at_gate.wait(5)
+    second = queue.submit("a.png", "out", params={"AO": {"radius": 12}})
+    assert second is not first and first.cancelled.is_set()
+    _release(queue)
+    queue.wait_for(2)
+    assert ("a.png", "cancelled") in queue.events  # Stopped at the next stage boundary
+    assert queue.engine_stub.runs[-1] == ("a.png", {"AO": {"radius": 12}})
+    assert queue.events.count(("a.png", "done")) == 1
+
+
+def test_cancel_where_drops_queued_and_stops_running_jobs(queue):
+    queue.submit("old.png", "out")
+    assert queue.engine_stub.at_gate.wait(5)
+    queue.submit("old2.png", "out")
+    queue.submit("new.png", "out")
+    assert queue.cancel_where(lambda job: job.image_path.startswith("old")) == 2
+    _release(queue)
+    queue.wait_for(3)
+    assert [path for path, _ in queue.engine_stub.runs] == ["old.png", "new.png"]
+    assert ("old.png", "cancelled") in queue.events
+    assert ("old2.png", "cancelled") in queue.events
+    assert ("new.png", "done") in queue.events
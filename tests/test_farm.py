@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import cv2
+import numpy as np
+import pytest
+from farm import FarmQueue, FarmWorker, run_local_workers
+
+
+def _sources(directory, count):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"tex{i}.png")
+        cv2.imwrite(path, rng.integers(0, 256, (48, 64, 3), dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def _read_done(queue, job_id):
+    with open(queue._path("done", job_id, ".json")) as f:
+        return json.load(f)
+
+
+def test_local_workers_reclaim_stale_claim_and_resume(tmp_path):
+    root = str(tmp_path / "queue")
+    out = str(tmp_path / "out")
+    queue = FarmQueue(root)
+    job_ids = [queue.submit(path, out) for path in _sources(str(tmp_path), 4)]
+    
+    # A previous run crashed: it finished one job and died holding a claim on another
+    queue.mark_done(job_ids[0], "crashed-worker", {}, 0.0)
+    assert queue.claim(job_ids[1], "crashed-worker")
+    old = time.time() - 120
+    os.utime(queue._path("claims", job_ids[1], ".lock"), (old, old))
+    
+    run_local_workers(root, 2, heartbeat=0.2, stale_after=5.0, poll_interval=0.1)
+    
+    assert queue.status() == {"total": 4, "done": 4, "failed": 0, "running": 0, "queued": 0}
+    # Journaled work isn't redone, the abandoned claim was taken over
+    assert _read_done(queue, job_ids[0])["worker"] == "crashed-worker"
+    assert _read_done(queue, job_ids[1])["worker"] != "crashed-worker"
+    assert os.path.exists(os.path.join(out, "tex1_Normal.png"))
+
+
+def test_live_claim_is_not_reclaimed(tmp_path):
+    queue = FarmQueue(str(tmp_path / "queue"))
+    job_id = queue.submit(_sources(str(tmp_path), 1)[0], str(tmp_path / "out"))
+    assert queue.claim(job_id, "worker-a")
+    assert not queue.reclaim_if_stale(job_id, stale_after=5.0)
+    assert queue.owner(job_id) == "worker-a"
+
+
+class _SlowEngine:
+    """Stands in for TextureEngine: loses its claim partway through the job."""
+
+    def __init__(self, queue, job_id):
+        self.queue = queue
+        self.job_id = job_id
+
+    def process_pipeline(self, image_path, output_dir, progress=None, **kwargs):
+        progress("Loading...")
+        with open(self.queue._path("claims", self.job_id, ".lock"), "w") as f:
+            f.write("worker-b")  # Reclaimed and claimed by another worker
+        time.sleep(0.5)
+        progress("Saving maps...")
+        return {}
+
+
+def test_worker_stops_when_claim_is_lost(tmp_path):
+    root = str(tmp_path / "queue")
+    queue = FarmQueue(root)
+    job_id = queue.submit(_sources(str(tmp_path), 1)[0], str(tmp_path / "out"))
+    worker = FarmWorker(root, engine=_SlowEngine(queue, job_id), heartbeat=0.05)
+    assert worker.run_once()
+    assert not queue.is_done(job_id)
+    assert not queue.is_failed(job_id)
+    assert queue.owner(job_id) == "worker-b"
+
+
+def test_resubmit_with_other_options_queues_a_new_job(tmp_path):
+    queue = FarmQueue(str(tmp_path / "queue"))
+    source = _sources(str(tmp_path), 1)[0]
+    out = str(tmp_path / "out")
+    first = queue.submit(source, out)
+    assert queue.submit(source, out) == first
+    assert queue.submit(source, out, resolutions=[512], fold=True) != first
+    assert queue.submit(source, str(tmp_path / "other")) != first
+    
+    cv2.imwrite(source, np.zeros((48, 64, 3), np.uint8))
+    os.utime(source, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert queue.submit(source, out) != first
+
+
+class _CountingEngine:
+    def __init__(self):
+        self.processed = []
+
+    def process_pipeline(self, image_path, output_dir, progress=None, **kwargs):
+        self.processed.append(image_path)
+        return {}
+
+
+def test_worker_lists_the_queue_per_pass_not_per_job(tmp_path, monkeypatch):
+    root = str(tmp_path / "queue")
+    queue = FarmQueue(root)
+    for path in _sources(str(tmp_path), 20):
+        queue.submit(path, str(tmp_path / "out"))
+    
+    worker = FarmWorker(root, engine=_CountingEngine())
+    listings = []
+    original = FarmQueue.listing
+    monkeypatch.setattr(FarmQueue, "listing", lambda self, sub, ext=".json": listings.append(sub) or original(self, sub, ext))
+    monkeypatch.setattr(FarmQueue, "is_failed", lambda self, job_id: pytest.fail("per-job stat"))
+    
+    assert worker.run() == 20
+    assert len(listings) <= 8  # One working pass plus the final empty one, 4 listings each
+
+
+def test_workers_start_at_different_jobs(tmp_path):
+    root = str(tmp_path / "queue")
+    queue = FarmQueue(root)
+    for path in _sources(str(tmp_path), 5):
+        queue.submit(path, str(tmp_path / "out"))
+    worker = FarmWorker(root, engine=_CountingEngine())
+    worker._offset = 3
+    open_jobs, _ = worker._scan()
+    assert open_jobs[0] == queue.job_ids()[3]
+    assert sorted(open_jobs) == queue.job_ids()
+
+
+class _FailingEngine:
+    def process_pipeline(self, *args, **kwargs):
+        raise RuntimeError("broken source")
+
+
+def test_retry_failed_retries_once_per_run(tmp_path):
+    root = str(tmp_path / "queue")
+    queue = FarmQueue(root)
+    job_id = queue.submit(_sources(str(tmp_path), 1)[0], str(tmp_path / "out"))
+    queue.mark_failed(job_id, "old-worker", "earlier error")
+    assert FarmWorker(root, engine=_FailingEngine(), retry_failed=True).run() == 1
+    assert queue.is_failed(job_id)
@@ -0,0 +1,26 @@
+import numpy as np
+from fft_engine import FFTTextureEngine, TRANSFER_CACHE_SIZE
+
+
+def _gray(shape=(40, 56)):
+    return np.random.default_rng(0).random(shape).astype(np.float32)
+
+
+def test_maps_tile_seamlessly():
+    engine = FFTTextureEngine()
+    gray = _gray()
+    tiled = engine.generate_normal_map(np.tile(gray, (2, 2)))
+    single = engine.generate_normal_map(gray)
+    assert np.allclose(tiled[:40, :56], single, atol=1e-5)
+    assert np.allclose(tiled[40:, 56:], single, atol=1e-5)
+
+
+def test_transfer_cache_stays_small_across_slider_values():
+    engine = FFTTextureEngine()
+    gray = _gray()
+    for i in range(TRANSFER_CACHE_SIZE):
+        engine.generate_normal_map(gray, strength=1.0 + i * 0.1)
+        engine.generate_ao_map(gray, radius=4 + i)
+    assert len(engine._transfers) <= TRANSFER_CACHE_SIZE
+    # Only 1D transfers are kept, never a full-resolution 2D one
+    assert all(t.ndim == 1 for t in engine._transfers.values())
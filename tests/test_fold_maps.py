@@ -0,0 +1,116 @@
+import os
+import json
+import cv2
+import numpy as np
+from texture_engine import TextureEngine
+import texture_pack
+from texture_pack import TexturePack
+
+
+def _flat(path, value=128):
+    cv2.imwrite(str(path), np.full((64, 64, 3), value, np.uint8))
+    return str(path)
+
+
+def _noise(path, seed=0):
+    cv2.imwrite(str(path), np.random.default_rng(seed).integers(0, 256, (64, 64, 3), dtype=np.uint8))
+    return str(path)
+
+
+def _pngs(directory):
+    return sorted(f for f in os.listdir(directory) if f.endswith(".png") and "_" in f)
+
+
+def test_toggling_fold_rewrites_outputs(tmp_path):
+    source = _flat(tmp_path / "flat.png")
+    out = tmp_path / "out"
+    out.mkdir()
+    engine = TextureEngine()
+    
+    engine.process_pipeline(source, str(out), fold=True)
+    assert _pngs(out) == []
+    assert os.path.exists(out / "flat_Material.json")
+    
+    engine.process_pipeline(source, str(out), fold=False)
+    assert len(_pngs(out)) == 5
+    assert not os.path.exists(out / "flat_Material.json")
+    
+    engine.process_pipeline(source, str(out), fold=True)
+    assert _pngs(out) == []
+    with open(out / "flat_Material.json") as f:
+        assert sorted(json.load(f)["folded"]) == ["AO", "Albedo", "Displacement", "Normal", "Roughness"]
+
+
+def test_every_map_folded_into_a_ladder(tmp_path):
+    source = _flat(tmp_path / "flat.png")
+    out = tmp_path / "out"
+    out.mkdir()
+    paths = TextureEngine().process_pipeline(source, str(out), resolutions=[64, 32], fold=True)
+    assert sorted(paths) == [32, 64]
+    assert paths[64]["AO"] == f"{out}/64/flat_Material.json"
+    assert not os.path.exists(out / "flat_Material.json")
+
+
+def test_ladder_levels_import_with_their_folded_maps(tmp_path, monkeypatch):
+    import sys
+    import importlib
+    import unreal_stub
+    monkeypatch.setitem(sys.modules, "unreal", unreal_stub)
+    monkeypatch.delitem(sys.modules, "unreal_importer", raising=False)
+    importer = importlib.import_module("unreal_importer")
+    
+    out = tmp_path / "out"
+    out.mkdir()
+    engine = TextureEngine()
+    engine.process_pipeline(_flat(tmp_path / "flat.png"), str(out), resolutions=[64, 32], fold=True)
+    engine.process_pipeline(_noise(tmp_path / "noise.png"), str(out), resolutions=[64, 32], fold=True)
+    for size in ("64", "32"):
+        level_dir = str(out / size)
+        assert len(importer.collect_groups_from_dir(level_dir)["noise"]) == 5
+        assert sorted(importer.collect_folded_from_dir(level_dir)["flat"]) == [
+            "AO", "Albedo", "Displacement", "Normal", "Roughness"]
+
+
+def test_unchanged_sidecar_keeps_folded_maps_fresh(tmp_path, capsys):
+    source = _flat(tmp_path / "flat.png")
+    out = tmp_path / "out"
+    out.mkdir()
+    engine = TextureEngine()
+    engine.process_pipeline(source, str(out), fold=True)
+    
+    for contrast in (2.0, 1.0, 2.0):
+        capsys.readouterr()
+        engine.process_pipeline(source, str(out), params={"Roughness": {"contrast": contrast}}, fold=True)
+        assert "Regenerated 1 of 5 maps" in capsys.readouterr().out
+    
+    mtime = os.stat(out / "flat_Material.json").st_mtime_ns
+    engine._written.clear()  # Force a rewrite of identical content
+    engine.process_pipeline(source, str(out), params={"Roughness": {"contrast": 2.0}}, fold=True)
+    assert os.stat(out / "flat_Material.json").st_mtime_ns == mtime
+
+
+def test_pack_build_with_fold_and_ladder_on_flat_source(tmp_path):
+    source = _flat(tmp_path / "flat.png")
+    pack_path = str(tmp_path / "flat.tpack")
+    assert texture_pack.main(["build", pack_path, source, "--fold", "--ladder"]) == 0
+    with TexturePack(pack_path) as pack:
+        assert sorted(pack.material("flat")["folded"]) == ["AO", "Albedo", "Displacement", "Normal", "Roughness"]
+        assert pack.maps("flat") == []
+
+
+def test_shared_reference_is_not_reused_after_the_file_changed(tmp_path):
+    first, second = _noise(tmp_path / "a.png"), _noise(tmp_path / "b.png")
+    out = tmp_path / "out"
+    out.mkdir()
+    engine = TextureEngine()
+    engine.process_pipeline(first, str(out), maps=["AO"], fold=True)
+    engine.process_pipeline(second, str(out), maps=["AO"], fold=True)
+    with open(out / "b_Material.json") as f:
+        info = json.load(f)["folded"]["AO"]
+    assert info["shared"] == os.path.abspath(out / "a_AO.png") and "sha1" in info
+    
+    # a_AO.png now holds other pixels: b must get its own file back
+    engine.process_pipeline(first, str(out), maps=["AO"], params={"AO": {"radius": 8}}, fold=True)
+    engine.process_pipeline(second, str(out), maps=["AO"], fold=True)
+    assert os.path.exists(out / "b_AO.png")
+    assert not os.path.exists(out / "b_Material.json")
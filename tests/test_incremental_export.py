@@ -0,0 +1,81 @@
+import os
+import cv2
+import numpy as np
+import pytest
+from texture_engine import TextureEngine
+from calibration import DispatchTable
+
+
+class Cancelled(Exception):
+    pass
+
+
+def test_cancelled_run_keeps_finished_maps(tmp_path):
+    source = str(tmp_path / "src.png")
+    cv2.imwrite(source, np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8))
+    engine = TextureEngine()
+    
+    def cancel_at_ao(stage):
+        if stage.startswith("Generating AO"):
+            raise Cancelled()
+    
+    with pytest.raises(Cancelled):
+        engine.process_pipeline(source, str(tmp_path), progress=cancel_at_ao)
+    entry = next(iter(engine._retained.values()))
+    assert sorted(entry["maps"]) == ["Albedo", "Normal", "Roughness"]
+    
+    # The rerun only generates what the cancelled run didn't finish
+    stages = []
+    engine.process_pipeline(source, str(tmp_path), progress=stages.append)
+    assert [s for s in stages if s.startswith(("Generating", "Delighting"))] == [
+        "Generating AO...", "Generating Height..."]
+
+
+def _write(path, img, stamp):
+    cv2.imwrite(path, img)
+    os.utime(path, ns=(stamp, stamp))  # A distinct source signature for every edit
+
+
+def _fresh_maps(path, backend):
+    engine = TextureEngine()
+    engine.dispatch = DispatchTable.fixed(backend)
+    return engine.generate_maps(engine._load_image_as_float(path))
+
+
+@pytest.mark.parametrize("backend", ["separable", "filter2d"])
+def test_patched_border_edit_matches_a_full_run(tmp_path, backend):
+    source = str(tmp_path / "src.png")
+    # Not a multiple of INCREMENTAL_BLOCK, so the edit touches a partial block
+    img = np.random.default_rng(0).integers(0, 256, (1000, 1090, 3), dtype=np.uint8)
+    _write(source, img, 10**18)
+    engine = TextureEngine()
+    engine.dispatch = DispatchTable.fixed(backend)
+    engine.process_pipeline(source, str(tmp_path))
+    
+    img[985:, 1070:] = 255 - img[985:, 1070:]  # Bottom-right corner
+    _write(source, img, 2 * 10**18)
+    stages = []
+    engine.process_pipeline(source, str(tmp_path), progress=stages.append)
+    assert len([s for s in stages if s.endswith("(1 edited regions)")]) == 4
+    
+    retained = next(iter(engine._retained.values()))["maps"]
+    for map_name, expected in _fresh_maps(source, backend).items():
+        assert np.array_equal(retained[map_name][1], expected), map_name
+
+
+def test_resized_source_is_regenerated_in_full(tmp_path):
+    source = str(tmp_path / "src.png")
+    rng = np.random.default_rng(0)
+    _write(source, rng.integers(0, 256, (256, 256, 3), dtype=np.uint8), 10**18)
+    engine = TextureEngine()
+    engine.dispatch = DispatchTable.fixed("separable")
+    engine.process_pipeline(source, str(tmp_path))
+    
+    _write(source, rng.integers(0, 256, (192, 320, 3), dtype=np.uint8), 2 * 10**18)
+    stages = []
+    engine.process_pipeline(source, str(tmp_path), progress=stages.append)
+    assert not [s for s in stages if "edited regions" in s]
+    
+    retained = next(iter(engine._retained.values()))["maps"]
+    for map_name, expected in _fresh_maps(source, "separable").items():
+        assert np.array_equal(retained[map_name][1], expected), map_name
@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+import pytest
+from calibration import DispatchTable
+from texture_engine import TextureEngine
+
+
+def _reference_gradients(img_gray, strength, detail_weight, shape_weight):
+    """The original filter chain: Sobel, Gaussian then Sobel, blend, strength."""
+    fine_x = cv2.Sobel(img_gray, cv2.CV_32F, 1, 0, ksize=3)
+    fine_y = cv2.Sobel(img_gray, cv2.CV_32F, 0, 1, ksize=3)
+    blurred = cv2.GaussianBlur(img_gray, (9, 9), 0)
+    shape_x = cv2.Sobel(blurred, cv2.CV_32F, 1, 0, ksize=5)
+    shape_y = cv2.Sobel(blurred, cv2.CV_32F, 0, 1, ksize=5)
+    gain = -strength * 4.0
+    return ((fine_x * detail_weight + shape_x * shape_weight) * gain,
+            (fine_y * detail_weight + shape_y * shape_weight) * gain)
+
+
+def _gray():
+    img = np.random.default_rng(0).random((97, 130)).astype(np.float32)
+    return cv2.GaussianBlur(img, (3, 3), 0)  # Some structure at every scale
+
+
+@pytest.mark.parametrize("backend", ["separable", "filter2d"])
+def test_precomposed_normal_kernels_match_filter_chain(backend):
+    engine = TextureEngine()
+    engine.dispatch = DispatchTable.fixed(backend)
+    gray = _gray()
+    args = (2.5, 0.3, 0.7)  # Non-default strength and weights
+    
+    expected_x, expected_y = _reference_gradients(gray, *args)
+    grad_x, grad_y = engine._normal_gradients(gray, *args)
+    scale = max(np.abs(expected_x).max(), np.abs(expected_y).max())
+    assert np.abs(grad_x - expected_x).max() <= 1e-5 * scale  # Borders included
+    assert np.abs(grad_y - expected_y).max() <= 1e-5 * scale
+    
+    normal = engine.generate_normal_map(gray, *args)
+    z = np.ones_like(expected_x)
+    length = np.sqrt(expected_x ** 2 + expected_y ** 2 + z ** 2)
+    expected = np.clip(cv2.merge([expected_x / length, expected_y / length, z / length]) * 0.5 + 0.5, 0.0, 1.0)
+    assert np.abs(normal - expected).max() < 1e-4
+
+
+@pytest.mark.parametrize("backend", ["separable", "filter2d"])
+def test_precomposed_height_kernel_matches_blur_and_blend(backend):
+    engine = TextureEngine()
+    engine.dispatch = DispatchTable.fixed(backend)
+    gray = _gray()
+    blurred = cv2.GaussianBlur(gray, (31, 31), 0)
+    expected = np.clip(cv2.addWeighted(gray, 0.4, blurred, 0.6, 0), 0.0, 1.0)
+    assert np.abs(engine.generate_height_map(gray) - expected).max() < 1e-5
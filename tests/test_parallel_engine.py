@@ -0,0 +1,52 @@
+import numpy as np
+from multiprocessing import shared_memory
+import pytest
+from texture_engine import TextureEngine
+from parallel_engine import ParallelTextureEngine
+
+MAPS = ["Normal", "AO", "Displacement"]
+
+
+def _image(shape, seed=0):
+    return np.random.default_rng(seed).random(shape + (3,)).astype(np.float32)
+
+
+@pytest.fixture
+def engine():
+    engine = ParallelTextureEngine(workers=2)
+    yield engine
+    engine.close()
+
+
+def test_banded_maps_match_serial_output(engine):
+    serial = TextureEngine()
+    params = {"AO": {"radius": 12}}
+    for shape in [(300, 160), (180, 220)]:  # Second image reallocates every block
+        raw = _image(shape)
+        expected = serial.generate_maps(raw, maps=MAPS, params=params)
+        result = engine.generate_maps(raw, maps=MAPS, params=params)
+        assert len(engine.pool._bands(shape[0], 6)) == 2  # Normal is split across both workers
+        for map_name in MAPS:
+            assert result[map_name].shape == expected[map_name].shape
+            assert np.array_equal(result[map_name], expected[map_name]), map_name
+
+
+def test_close_unlinks_shared_blocks(engine):
+    engine.generate_maps(_image((64, 64)), maps=["Roughness"])
+    names = [shm.name for shm, _ in engine.pool._blocks.values()]
+    assert names
+    engine.close()
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name)
+
+
+def test_pipeline_reuses_the_pools_grayscale(engine, tmp_path, monkeypatch):
+    import cv2
+    source = str(tmp_path / "src.png")
+    cv2.imwrite(source, (_image((96, 64)) * 255).astype(np.uint8))
+    conversions = []
+    original = TextureEngine._to_grayscale
+    monkeypatch.setattr(TextureEngine, "_to_grayscale", lambda self, img: conversions.append(img.shape) or original(self, img))
+    engine.process_pipeline(source, str(tmp_path), maps=["Roughness", "AO"])
+    assert conversions == []  # Only the pool converts, once, into shared memory
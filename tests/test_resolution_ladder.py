@@ -0,0 +1,27 @@
+import os
+import cv2
+import numpy as np
+from texture_engine import TextureEngine
+
+
+def _write_source(path, size=(96, 128)):
+    rng = np.random.default_rng(0)
+    cv2.imwrite(str(path), rng.integers(0, 256, size + (3,), dtype=np.uint8))
+
+
+def test_ladder_skips_sizes_above_source(tmp_path):
+    engine = TextureEngine()
+    _write_source(tmp_path / "src.png")
+    paths = engine.process_pipeline(str(tmp_path / "src.png"), str(tmp_path), resolutions=[256, 64, 32])
+    assert sorted(paths) == [32, 64]
+    assert os.path.exists(paths[64]["Normal"])
+
+
+def test_source_smaller_than_every_size_is_written_at_its_own_resolution(tmp_path):
+    engine = TextureEngine()
+    _write_source(tmp_path / "src.png")
+    paths = engine.process_pipeline(str(tmp_path / "src.png"), str(tmp_path), resolutions=[512, 256])
+    assert sorted(paths) == [128]
+    for path in paths[128].values():
+        assert os.path.exists(path)
+    assert cv2.imread(paths[128]["AO"]).shape[:2] == (96, 128)
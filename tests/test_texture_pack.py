@@ -0,0 +1,68 @@
+import os
+import sys
+import importlib
+import cv2
+import numpy as np
+import pytest
+import unreal_stub
+from texture_engine import TextureEngine
+from texture_pack import TexturePack, TexturePackWriter
+
+
+def _source(path, seed):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cv2.imwrite(path, np.random.default_rng(seed).integers(0, 256, (32, 32, 3), dtype=np.uint8))
+    return path
+
+
+def test_same_basename_from_two_folders_keeps_both(tmp_path):
+    first = _source(str(tmp_path / "a" / "Wood.png"), 0)
+    second = _source(str(tmp_path / "b" / "Wood.png"), 1)
+    engine = TextureEngine()
+    pack_path = str(tmp_path / "lib.tpack")
+    with TexturePackWriter(pack_path) as writer:
+        engine.process_pipeline(first, archive=writer, maps=["Roughness"])
+        engine.process_pipeline(second, archive=writer, maps=["Roughness"])
+    
+    with TexturePack(pack_path) as pack:
+        assert pack.materials() == ["Wood", "Wood_2"]
+        assert pack.material("Wood")["source"] == os.path.abspath(first)
+        assert pack.material("Wood_2")["source"] == os.path.abspath(second)
+        assert not np.array_equal(pack.read_array("Wood", "Roughness"), pack.read_array("Wood_2", "Roughness"))
+
+
+def test_writer_rejects_duplicate_members(tmp_path):
+    img = np.zeros((4, 4), np.float32)
+    with TexturePackWriter(str(tmp_path / "p.tpack")) as writer:
+        writer.add_material("Wood", {"AO": img}, source="/a/Wood.png")
+        with pytest.raises(ValueError):
+            writer.add_material("Wood", {}, source="/b/Wood.png")
+        with pytest.raises(ValueError):
+            writer.add_material("Wood", {"AO": img})
+
+
+def test_importer_loads_without_texture_pack_module(monkeypatch):
+    monkeypatch.setitem(sys.modules, "unreal", unreal_stub)
+    monkeypatch.setitem(sys.modules, "texture_pack", None)  # Not copied to Content/Python
+    monkeypatch.delitem(sys.modules, "unreal_importer", raising=False)
+    importer = importlib.import_module("unreal_importer")
+    assert importer.ARCHIVE_PATH is None
+
+
+def test_importer_warns_when_pack_has_no_maps_at_level(monkeypatch, tmp_path):
+    import texture_pack
+    monkeypatch.setitem(sys.modules, "unreal", unreal_stub)
+    monkeypatch.delitem(sys.modules, "unreal_importer", raising=False)
+    importer = importlib.import_module("unreal_importer")
+    warnings = []
+    monkeypatch.setattr(unreal_stub, "log_warning", warnings.append)
+    
+    pack_path = str(tmp_path / "lib.tpack")
+    assert texture_pack.main(["build", pack_path, _source(str(tmp_path / "Wood.png"), 0), "--ladder"]) == 0
+    staging = str(tmp_path / "staging")
+    os.makedirs(staging)
+    with TexturePack(pack_path) as pack:
+        assert importer.collect_groups_from_pack(pack, staging) == {}  # Only a 32 level
+        assert len(warnings) == 1 and "ARCHIVE_LEVEL" in warnings[0] and "32" in warnings[0]
+        assert len(importer.collect_groups_from_pack(pack, staging, 32)["Wood"]) == 5
+        assert len(warnings) == 1
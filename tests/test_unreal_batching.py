@@ -0,0 +1,107 @@
+import os
+import sys
+import importlib
+import cv2
+import numpy as np
+import pytest
+import unreal_stub
+
+MASTER = "/Game/Materials/M_Master_Standard"
+
+
+@pytest.fixture
+def unreal(monkeypatch):
+    monkeypatch.setitem(sys.modules, "unreal", unreal_stub)
+    for name in ("unreal_asset_ops", "TextureGenTool", "unreal_importer"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    unreal_stub.reset(MASTER)
+    return unreal_stub
+
+
+def _sources(directory, count):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"Tex{i}.png")
+        cv2.imwrite(path, rng.integers(0, 256, (32, 32, 3), dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def test_plugin_batches_the_whole_selection(unreal, tmp_path):
+    tool = importlib.import_module("TextureGenTool")
+    unreal.EditorUtilityLibrary.selection = [
+        unreal.source_texture(f"/Game/Src/Tex{i}", path) for i, path in enumerate(_sources(str(tmp_path), 3))
+    ]
+    tool.TextureGenAction().execute(None)
+    
+    assert unreal.calls["import_asset_tasks"] == 1
+    assert unreal.calls["imported"] == 9  # Normal, Roughness, AO for each texture
+    assert unreal.calls[f"load_asset:{MASTER}"] == 1
+    assert unreal.calls["save_loaded_assets"] == 1
+    assert unreal.calls["save_asset"] == 0
+    assert unreal.calls["create_asset"] == 3
+
+
+def test_importer_batches_every_group(unreal, tmp_path):
+    importer = importlib.import_module("unreal_importer")
+    groups = {}
+    for i in range(3):
+        groups[f"Mat{i}"] = []
+        for map_name in ("Albedo", "Normal", "Roughness"):
+            path = str(tmp_path / f"Mat{i}_{map_name}.png")
+            cv2.imwrite(path, np.zeros((8, 8, 3), np.uint8))
+            groups[f"Mat{i}"].append(path)
+    importer.import_groups(groups)
+    
+    assert unreal.calls["import_asset_tasks"] == 1
+    assert unreal.calls["imported"] == 9
+    assert unreal.calls[f"load_asset:{MASTER}"] == 1
+    assert unreal.calls["save_loaded_assets"] == 1
+    assert unreal.calls["save_asset"] == 0
+    assert unreal.calls["set_material_instance_parent"] == 3
+
+
+def _flat_selection(unreal, tmp_path):
+    path = str(tmp_path / "Flat.png")
+    cv2.imwrite(path, np.full((32, 32, 3), 128, np.uint8))
+    unreal.EditorUtilityLibrary.selection = [unreal.source_texture("/Game/Src/Flat", path)]
+    return path
+
+
+def test_plugin_does_not_fold_by_default(unreal, tmp_path):
+    tool = importlib.import_module("TextureGenTool")
+    _flat_selection(unreal, tmp_path)
+    tool.TextureGenAction().execute(None)
+    assert unreal.calls["imported"] == 3
+    assert unreal.calls["set_scalar_parameter"] == 0
+
+
+def test_plugin_folds_only_maps_the_master_can_take(unreal, tmp_path, monkeypatch):
+    tool = importlib.import_module("TextureGenTool")
+    monkeypatch.setattr(tool, "FOLD_UNIFORM_MAPS", True)
+    unreal.reset(MASTER, "/Game/Src/Flat_AO", params=["RoughnessValue", "AOValue"])
+    source = _flat_selection(unreal, tmp_path)
+    cv2.imwrite(source.replace(".png", "_AO.png"), np.zeros((32, 32), np.uint8))  # From an earlier run
+    tool.TextureGenAction().execute(None)
+    
+    assert unreal.calls["imported"] == 1  # Normal: the Master has no NormalValue
+    assert unreal.calls["set_scalar_parameter"] == 2
+    assert "/Game/Src/Flat_AO" not in unreal.store  # Stale texture asset removed
+    assert not os.path.exists(source.replace(".png", "_AO.png"))
+
+
+def test_importer_skips_constants_and_stale_shared_maps(unreal, tmp_path):
+    importer = importlib.import_module("unreal_importer")
+    unreal.reset(MASTER, params=["RoughnessValue"])
+    shared = str(tmp_path / "Other_AO.png")
+    cv2.imwrite(shared, np.zeros((8, 8), np.uint8))
+    folded = {"Mat": {
+        "Roughness": {"constant": 0.5},
+        "Normal": {"constant": [0.5, 0.5, 1.0]},   # No NormalValue on the Master
+        "AO": {"shared": shared, "sha1": "0" * 40},  # File no longer holds those pixels
+    }}
+    importer.import_groups({}, folded)
+    assert unreal.calls["set_scalar_parameter"] == 1
+    assert unreal.calls["set_vector_parameter"] == 0
+    assert unreal.calls["set_texture_parameter"] == 0
@@ -0,0 +1,200 @@
+"""
+Minimal stand-in for Unreal's `unreal` Python module. Records how often each
+editor API is called (`calls`) and keeps created/imported assets in `store`,
+so batching can be checked outside the editor.
+"""
+from collections import Counter
+
+calls = Counter()
+store = {}
+# Scalar/vector parameter names of every material
+parameters = []
+
+
+def reset(*existing, params=()):
+    calls.clear()
+    store.clear()
+    parameters[:] = params
+    for path in existing:
+        store[path] = Asset(path)
+
+
+class _Object:
+    def __init__(self, *args, **kwargs):
+        self.__dict__["props"] = {}
+
+    def set_editor_property(self, name, value):
+        self.props[name] = value
+
+    def get_editor_property(self, name):
+        return self.props.get(name)
+
+    def post_edit_change(self):
+        pass
+
+    def __setattr__(self, name, value):
+        self.props[name] = value
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["props"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class Asset(_Object):
+    def __init__(self, path):
+        super().__init__()
+        self.__dict__["path"] = path
+
+    def get_path_name(self):
+        return self.path
+
+    def get_name(self):
+        return self.path.rsplit("/", 1)[1]
+
+
+class Texture2D(Asset):
+    pass
+
+
+class _ImportData:
+    def __init__(self, filename):
+        self.filename = filename
+
+    def get_first_filename(self):
+        return self.filename
+
+
+def source_texture(path, filename):
+    """A Texture2D asset imported from `filename` on disk."""
+    texture = Texture2D(path)
+    texture.set_editor_property("asset_import_data", _ImportData(filename))
+    store[path] = texture
+    return texture
+
+
+class AssetImportTask(_Object): pass
+class TextureFactory(_Object): pass
+class MaterialFactoryNew(_Object): pass
+class MaterialInstanceConstantFactoryNew(_Object): pass
+class MaterialInstanceConstant: pass
+class Material: pass
+class ToolMenuEntryScript: pass
+
+
+class TextureCompressionSettings:
+    TC_DEFAULT = 0
+    TC_NORMALMAP = 1
+    TC_MASKS = 2
+    TC_GRAYSCALE = 3
+
+
+class LinearColor:
+    def __init__(self, *values):
+        self.values = values
+
+
+class _AssetTools:
+    def import_asset_tasks(self, tasks):
+        calls["import_asset_tasks"] += 1
+        calls["imported"] += len(tasks)
+        for task in tasks:
+            path = f"{task.destination_path}/{task.destination_name}"
+            store[path] = Texture2D(path)
+
+    def create_asset(self, name, folder, asset_class, factory):
+        calls["create_asset"] += 1
+        asset = Asset(f"{folder}/{name}")
+        store[asset.path] = asset
+        return asset
+
+
+class AssetToolsHelpers:
+    @staticmethod
+    def get_asset_tools():
+        return _AssetTools()
+
+
+class EditorAssetLibrary:
+    @staticmethod
+    def load_asset(path):
+        calls["load_asset"] += 1
+        calls[f"load_asset:{path}"] += 1
+        return store.get(path)
+
+    @staticmethod
+    def does_asset_exist(path):
+        calls["does_asset_exist"] += 1
+        return path in store
+
+    @staticmethod
+    def does_directory_exist(path):
+        calls["does_directory_exist"] += 1
+        return False
+
+    @staticmethod
+    def make_directory(path):
+        calls["make_directory"] += 1
+
+    @staticmethod
+    def save_loaded_assets(assets, only_if_is_dirty=True):
+        calls["save_loaded_assets"] += 1
+        calls["saved"] += len(assets)
+
+    @staticmethod
+    def save_asset(path):
+        calls["save_asset"] += 1
+
+    @staticmethod
+    def delete_asset(path):
+        calls["delete_asset"] += 1
+        return store.pop(path, None) is not None
+
+
+class MaterialEditingLibrary:
+    @staticmethod
+    def set_material_instance_parent(instance, parent):
+        calls["set_material_instance_parent"] += 1
+
+    @staticmethod
+    def set_material_instance_texture_parameter_value(instance, name, value):
+        calls["set_texture_parameter"] += 1
+
+    @staticmethod
+    def set_material_instance_scalar_parameter_value(instance, name, value):
+        calls["set_scalar_parameter"] += 1
+
+    @staticmethod
+    def set_material_instance_vector_parameter_value(instance, name, value):
+        calls["set_vector_parameter"] += 1
+
+    @staticmethod
+    def get_scalar_parameter_names(material):
+        calls["get_parameter_names"] += 1
+        return [name for name in parameters if name not in ("BaseColorValue", "NormalValue")]
+
+    @staticmethod
+    def get_vector_parameter_names(material):
+        return [name for name in parameters if name in ("BaseColorValue", "NormalValue")]
+
+
+class EditorUtilityLibrary:
+    selection = []
+
+    def get_selected_assets(self):
+        return list(self.selection)
+
+
+def log(message):
+    pass
+
+log_warning = log_error = log
+
+
+def uclass():
+    return lambda cls: cls
+
+
+def ufunction(**kwargs):
+    return lambda func: func